@@ -1,36 +1,134 @@
 import os
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import json
-
-load_dotenv()
-client = AzureOpenAI(
-  api_key = os.getenv("AZURE_OPENAI_API_KEY"),  
-  api_version = '2024-12-01-preview',
-  azure_endpoint = 'https://aia-chat.openai.azure.com/'
-)
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+from openai import APITimeoutError, RateLimitError
+from pydantic import ValidationError
+from .llm_backends import get_backend
+from .hedging import hedged_create
+
+# Azure, an OpenAI-compatible server or the replay backend, chosen with LLM_BACKEND
+backend = get_backend()
 CHAT_MODEL = "gpt-4o-mini"
 
-def chat(messages):
+# Deployments can be swapped per environment, both default to CHAT_MODEL
+FAST_MODEL = os.getenv("AZURE_OPENAI_FAST_DEPLOYMENT", CHAT_MODEL)
+STRONG_MODEL = os.getenv("AZURE_OPENAI_STRONG_DEPLOYMENT", CHAT_MODEL)
+# Secondary deployment used when the routed one times out or is out of quota
+FALLBACK_MODEL = os.getenv("AZURE_OPENAI_FALLBACK_DEPLOYMENT")
+
+DEFAULT_ROUTE = {"model": CHAT_MODEL, "max_tokens": None, "temperature": 0, "timeout": 60, "fallback": FALLBACK_MODEL}
+
+# Short lookups go to the fast deployment with tight limits, written prose goes to the strong one
+MODEL_ROUTES = {
+    "BASIC_INFO": {"model": FAST_MODEL, "max_tokens": 500, "timeout": 20},
+    "SCOPE": {"model": STRONG_MODEL, "max_tokens": 800, "timeout": 45},
+    "CONTRACT_STRUCTURE": {"model": STRONG_MODEL, "max_tokens": 800, "timeout": 45},
+    "PLAN": {"model": STRONG_MODEL, "max_tokens": 2500, "timeout": 90},
+    "KEY_DELIVERABLES": {"model": FAST_MODEL, "max_tokens": 400, "timeout": 20},
+    "ASSUMPTIONS": {"model": FAST_MODEL, "max_tokens": 500, "timeout": 20},
+    "TIMELINE": {"model": FAST_MODEL, "max_tokens": 500, "timeout": 20},
+    "BUDGET": {"model": FAST_MODEL, "max_tokens": 500, "timeout": 20},
+    "DELIVERY_TEAM": {"model": FAST_MODEL, "max_tokens": 150, "timeout": 15},
+    "PAST_PROJECTS": {"model": FAST_MODEL, "max_tokens": 300, "timeout": 15},
+}
+
+# Token usage of the current pipeline run, keyed by section. Set up with track_usage().
+current_usage = ContextVar("current_usage", default=None)
+
+@contextmanager
+def track_usage():
+    usage = {}
+    token = current_usage.set(usage)
     try:
-        result = client.chat.completions.create(
-            model=CHAT_MODEL,
-            messages=messages,
-            temperature=0
-        )
+        yield usage
+    finally:
+        current_usage.reset(token)
+
+def record_usage(section, usage):
+    totals = current_usage.get()
+    if totals is None or usage is None:
+        return
+    section_totals = totals.setdefault(section or "OTHER", {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+    section_totals["calls"] += 1
+    section_totals["prompt_tokens"] += usage.prompt_tokens
+    section_totals["completion_tokens"] += usage.completion_tokens
+
+def get_route(section=None):
+    return {**DEFAULT_ROUTE, **MODEL_ROUTES.get(section, {})}
+
+def create_completion(messages, section=None, validate=None, **kwargs):
+    # Send the request to the section's deployment, retrying once on the fallback deployment
+    # if the first attempt times out or is rate limited. validate checks a hedged response before
+    # it is used, see hedging.py
+    route = get_route(section)
+    if route["max_tokens"]:
+        kwargs["max_tokens"] = route["max_tokens"]
+    has_fallback = route["fallback"] and route["fallback"] != route["model"]
+    # Don't spend the time budget retrying a slow deployment when there is a fallback to go to
+    kwargs.update(timeout=route["timeout"], max_retries=0 if has_fallback else None, temperature=route["temperature"])
+    try:
+        # Slow calls may get a duplicate request, see hedging.py
+        return hedged_create(backend.create, route["model"], messages, section, validate, **kwargs)
+    except (APITimeoutError, RateLimitError) as e:
+        if not has_fallback:
+            raise
+        print(f"{route['model']} failed for {section or 'request'} ({type(e).__name__}), retrying on {route['fallback']}")
+        return backend.create(route["fallback"], messages, **kwargs)
+
+def chat(messages, section=None):
+    # Returns None if the request fails
+    try:
+        result = create_completion(messages, section)
+        record_usage(section, result.usage)
         return result.choices[0].message.content
     except Exception as e:
-        return f"Error: {str(e)}"
-    
-def chat_structured(messages):
+        print(f"Error: {str(e)}")
+        return None
+
+def chat_stream(messages, section=None):
+    # Yields content deltas as they arrive. A failure, even part way through, is raised rather than
+    # ending the stream early, so a truncated section is never taken as complete
+    try:
+        stream = create_completion(messages, section, stream=True, stream_options={"include_usage": True})
+        for chunk in stream:
+            # The last chunk carries usage only, Azure also sends content filter results with no choices
+            if getattr(chunk, "usage", None):
+                record_usage(section, chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise
+
+@cache
+def get_response_format(schema):
+    # Built once per schema model rather than on every request
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema.__name__,
+            "strict": True,
+            "schema": schema.model_json_schema()
+        }
+    }
+
+def chat_structured(messages, schema, section=None):
+    # Returns a validated instance of the pydantic schema, or None if the request fails
     try:
-        result = client.chat.completions.create(
-            model=CHAT_MODEL,
-            messages=messages,
-            response_format={"type": "json_object"},
-            temperature=0
+        result = create_completion(
+            messages, section, validate=lambda completion: schema.model_validate_json(completion.choices[0].message.content),
+            response_format=get_response_format(schema)
         )
-        return json.loads(result.choices[0].message.content)
+        record_usage(section, result.usage)
+        message = result.choices[0].message
+        if getattr(message, "refusal", None):
+            print(f"Error: model refused to answer: {message.refusal}")
+            return None
+        return schema.model_validate_json(message.content)
+    except ValidationError as e:
+        print(f"Error: response did not match {schema.__name__}: {str(e)}")
+        return None
     except Exception as e:
-        return f"Error: {str(e)}"
-    
\ No newline at end of file
+        print(f"Error: {str(e)}")
+        return None
@@ -1,25 +1,66 @@
 from flask import Flask, render_template, request, send_file
-from main import extract_project_info, create_word_doc
-from projectinfo import clear_project_info, load_project_info, update_project_info
+from .main import extract_project_info
+from .costing import compute_costing, format_days, format_money
+from .render_service import render_docx
+import io
 import os
+import re
+import tempfile
+import time
+import uuid
 
 app = Flask(__name__)
+app.add_template_filter(format_days)
+app.add_template_filter(format_money)
+
+# Generated documents are written to a unique file per request so concurrent users never
+# share output, and any gunicorn worker on this host can serve the download
+OUTPUT_DIR = os.environ.get("PROPOSAL_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "proposal_agent"))
+OUTPUT_TTL_SECONDS = int(os.environ.get("PROPOSAL_OUTPUT_TTL", 3600))
+
+def document_path_for(document_id):
+    # Document IDs are uuid4 hex strings, anything else could escape OUTPUT_DIR
+    if not re.fullmatch(r"[0-9a-f]{32}", document_id):
+        return None
+    return os.path.join(OUTPUT_DIR, f"{document_id}.docx")
+
+def save_document(data):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    document_id = uuid.uuid4().hex
+    path = document_path_for(document_id)
+
+    # Write to a temporary name first so a download never sees a half written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return document_id
+
+def remove_expired_documents():
+    cutoff = time.time() - OUTPUT_TTL_SECONDS
+    try:
+        for name in os.listdir(OUTPUT_DIR):
+            path = os.path.join(OUTPUT_DIR, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+    except OSError as e:
+        print(f"Error removing expired documents: {str(e)}")
 
 @app.route("/", methods=["GET", "POST"])
 def home():
     table_data = {}
+    fragments = {}
     user_input = ""
-    document_path = None
+    document_id = None
+    costing = None
     
     if request.method == "POST":
         try:
             user_input = request.form["user_input"]
             
-            # Extract information from text input
+            # Extract information from text input, kept in memory for this request only
             if user_input.strip():
-                clear_project_info()
-                extract_project_info(user_input)
-                table_data = load_project_info()
+                table_data = extract_project_info(user_input, fragments=fragments)
             
             # Handle manual inputs if provided
             basic_info = table_data.get("BASIC_INFO", {})
@@ -32,11 +73,12 @@ def home():
                     basic_info["PROJECT MANAGER"] = request.form["project_manager"]
                 if request.form.get("author"):
                     basic_info["AUTHOR"] = request.form["author"]
-                update_project_info("BASIC_INFO", basic_info)
-                table_data = load_project_info()
+                table_data["BASIC_INFO"] = basic_info
 
-            document_path = "project_proposal.docx"
-            create_word_doc(filename=document_path)
+            document_id = save_document(render_docx(table_data, fragments))
+            remove_expired_documents()
+            # The page shows the durations and costs the document was rendered with
+            costing = compute_costing(table_data)
         
         except Exception as e:
             error_message = f"Error: {str(e)}"
@@ -44,17 +86,21 @@ def home():
     
     return render_template("index.html", 
                            table_data=table_data, 
+                           costing=costing,
                            user_input=user_input, 
-                           document_path=document_path)
+                           document_id=document_id)
 
-@app.route("/download")
-def download_document():
-    document_path = "project_proposal.docx"
-    if os.path.exists(document_path):
-        return send_file(document_path, 
+@app.route("/download/<document_id>")
+def download_document(document_id):
+    document_path = document_path_for(document_id)
+    if document_path and os.path.exists(document_path):
+        with open(document_path, "rb") as f:
+            buffer = io.BytesIO(f.read())
+        return send_file(buffer, 
                          as_attachment=True, 
-                         download_name='project_proposal.docx')
+                         download_name='project_proposal.docx',
+                         mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
     return "Document not found", 404
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
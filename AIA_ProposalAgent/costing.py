@@ -0,0 +1,158 @@
+import os
+import re
+import json
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import cache
+from pydantic import BaseModel
+from .projectinfo import DATA_DIR
+
+# Timeline and budget numbers are parsed once from the extracted sections into Decimal records,
+# so the document and anything quoting from a proposal read the same figures instead of
+# re-parsing LLM strings.
+#
+# Day rates come from data/ratecards.json:
+#   DEFAULT_DAY_RATE  rate for developer effort and any line without a rate of its own
+#   GST_RATE          added on top of the total
+#   ROLES             day rate per role, used for additional cost lines named after a role
+#   CLIENTS           per client overrides of DEFAULT_DAY_RATE and ROLES, keyed by company or client name
+
+RATE_CARDS_PATH = os.path.join(DATA_DIR, "ratecards.json")
+
+CENT = Decimal("0.01")
+NUMBER_PATTERN = re.compile(r"(?P<number>\d[\d,]*(?:\.\d+)?)\s?(?P<suffix>[kKmM]\b)?")
+
+class MilestoneEstimate(BaseModel):
+    description: str
+    days: Decimal
+
+class CostLine(BaseModel):
+    category: str
+    days: Decimal | None = None
+    day_rate: Decimal | None = None
+    cost: Decimal
+
+class Costing(BaseModel):
+    client: str | None
+    milestones: list[MilestoneEstimate]
+    total_days: Decimal
+    lines: list[CostLine]
+    subtotal: Decimal
+    gst_rate: Decimal
+    gst: Decimal
+    total: Decimal
+    # Total written in the input or extracted by the LLM, kept for comparison with the computed total
+    quoted_total: Decimal | None
+
+def parse_decimal(value):
+    # Number in an int, float or LLM string such as "5 days", "$12,500.50" or "12k", None if there isn't one
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return Decimal(str(value))
+    if not isinstance(value, str):
+        return None
+    match = NUMBER_PATTERN.search(value)
+    if not match:
+        return None
+    try:
+        number = Decimal(match.group("number").replace(",", ""))
+    except InvalidOperation:
+        return None
+    suffix = (match.group("suffix") or "").lower()
+    return number * {"k": 1000, "m": 1000000}.get(suffix, 1)
+
+@cache
+def load_rate_cards():
+    try:
+        with open(RATE_CARDS_PATH, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading ratecards.json: {str(e)}")
+        return {}
+
+def get_rate_card(client=None):
+    # The default card with any overrides for the client applied
+    rate_cards = load_rate_cards()
+    client_card = rate_cards.get("CLIENTS", {}).get(client, {}) if client else {}
+    return {
+        "DEFAULT_DAY_RATE": Decimal(client_card.get("DEFAULT_DAY_RATE", rate_cards.get("DEFAULT_DAY_RATE", "1600"))),
+        "GST_RATE": Decimal(rate_cards.get("GST_RATE", "0.10")),
+        "ROLES": {
+            role.lower(): Decimal(rate)
+            for role, rate in {**rate_cards.get("ROLES", {}), **client_card.get("ROLES", {})}.items()
+        }
+    }
+
+def find_client(basic_info):
+    # Rate cards can be keyed by either name, the company name is checked first
+    clients = load_rate_cards().get("CLIENTS", {})
+    for key in ("COMPANY NAME", "CLIENT"):
+        if basic_info.get(key) in clients:
+            return basic_info[key]
+    return basic_info.get("COMPANY NAME") or basic_info.get("CLIENT") or None
+
+def parse_milestones(timeline_data):
+    milestones = []
+    for milestone in timeline_data.get("MILESTONES", []):
+        days = parse_decimal(milestone.get("ESTIMATED_TIME"))
+        milestones.append(MilestoneEstimate(description=milestone.get("DESCRIPTION", ""), days=days or Decimal(0)))
+    return milestones
+
+def parse_additional_cost(cost_item, rate_card):
+    # A stated cost is used as is, otherwise days at the line's own rate or the rate for the role it names
+    category = cost_item.get("CATEGORY", "")
+    days = parse_decimal(cost_item.get("TIME"))
+    day_rate = parse_decimal(cost_item.get("DAY_RATE")) or rate_card["ROLES"].get(category.strip().lower())
+    cost = parse_decimal(cost_item.get("COST"))
+    if cost is None and days is not None and day_rate is not None:
+        cost = days * day_rate
+    if not category or cost is None:
+        return None
+    return CostLine(category=category, days=days, day_rate=day_rate, cost=cost.quantize(CENT, ROUND_HALF_UP))
+
+def compute_costing(project_data):
+    """
+    Parse the timeline and budget of a proposal into a Costing.
+
+    The total duration is the sum of the milestone estimates. TOTAL_DURATION is only used when
+    there are no milestones to sum.
+
+    :param project_data: Extracted sections
+    :return: Costing with every line, the subtotal, GST and total
+    """
+    client = find_client(project_data.get("BASIC_INFO", {}))
+    rate_card = get_rate_card(client)
+
+    timeline_data = project_data.get("TIMELINE", {})
+    milestones = parse_milestones(timeline_data)
+    if milestones:
+        total_days = sum((milestone.days for milestone in milestones), Decimal(0))
+    else:
+        total_days = parse_decimal(timeline_data.get("TOTAL_DURATION")) or Decimal(0)
+
+    day_rate = rate_card["DEFAULT_DAY_RATE"]
+    lines = [CostLine(category="Developer Effort", days=total_days, day_rate=day_rate, cost=(total_days * day_rate).quantize(CENT, ROUND_HALF_UP))]
+    budget_data = project_data.get("BUDGET", {})
+    for cost_item in budget_data.get("ADDITIONAL_COST", []):
+        line = parse_additional_cost(cost_item, rate_card)
+        if line:
+            lines.append(line)
+
+    subtotal = sum((line.cost for line in lines), Decimal(0))
+    gst = (subtotal * rate_card["GST_RATE"]).quantize(CENT, ROUND_HALF_UP)
+    return Costing(
+        client=client,
+        milestones=milestones,
+        total_days=total_days,
+        lines=lines,
+        subtotal=subtotal,
+        gst_rate=rate_card["GST_RATE"],
+        gst=gst,
+        total=subtotal + gst,
+        quoted_total=parse_decimal(budget_data.get("TOTAL_COST"))
+    )
+
+def format_days(days):
+    # 5 rather than 5.0, 2.5 stays 2.5
+    return f"{days.normalize():f}" if days is not None else ""
+
+def format_money(amount):
+    return f"{amount:,.2f}" if amount is not None else ""
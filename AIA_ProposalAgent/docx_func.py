@@ -5,13 +5,31 @@ from docx.oxml import parse_xml
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from datetime import datetime
+from functools import cache
+import io
 import json
 import os
+from .costing import format_days, format_money
 
 # Define directories for images and data
 IMAGES_DIR = os.path.join(os.path.dirname(__file__), "images")
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
+# Name variations mapped to the full names used as keys in deliveryteam.json
+NAME_VARIATIONS = {
+    "Sam": "Samuel Cunningham",
+    "Sam Cunningham": "Samuel Cunningham",
+    "Samuel": "Samuel Cunningham",
+    "Sean": "Sean Oldenburger",
+    "Lindsey": "Lindsey Hershman"
+}
+
+@cache
+def load_image(image_path):
+    # Image files are read once per process, every proposal then adds them from memory
+    with open(image_path, 'rb') as file:
+        return file.read()
+
 if os.path.exists("test_doc.docx"):
   os.remove("test_doc.docx")
 
@@ -81,6 +99,39 @@ def add_body_text(doc, text, size=11, font_name='Calibri', alignment=WD_ALIGN_PA
             
     return first_p
 
+def add_body_text_stream(doc, chunks, size=11, font_name='Calibri'):
+    # Same as add_body_text, but renders each line as soon as it is complete in a stream of text chunks
+    text = []
+    line = ""
+    for chunk in chunks:
+        text.append(chunk)
+        line += chunk
+        *complete_lines, line = line.split('\n')
+        for complete_line in complete_lines:
+            add_body_text(doc, complete_line, size=size, font_name=font_name)
+    if line:
+        add_body_text(doc, line, size=size, font_name=font_name)
+    return "".join(text)
+
+def render_text_fragment(chunks):
+    # Render streamed text into a scratch document, to be moved into the proposal with append_fragment
+    fragment = Document()
+    text = add_body_text_stream(fragment, chunks)
+    return text, fragment
+
+def append_fragment(doc, fragment):
+    # Move the paragraphs and tables of a fragment to the end of doc, keeping doc's section properties last.
+    # fragment is a document from render_text_fragment, or just its body element.
+    body = doc.element.body
+    fragment_body = fragment.element.body if hasattr(fragment, "element") else fragment
+    for element in list(fragment_body):
+        if element.tag.endswith('}sectPr'):
+            continue
+        if body.sectPr is not None:
+            body.sectPr.addprevious(element)
+        else:
+            body.append(element)
+
 def add_bullet_point(doc, text, size=11, font_name='Calibri'):
     p = doc.add_paragraph(text, style='ListBullet')
     if p.runs:
@@ -157,7 +208,7 @@ def create_header_table(doc, logo_path=None, company_name=None, company_name_fon
     if logo_path:
         pic_cell = table.rows[0].cells[0].paragraphs[0]
         run = pic_cell.add_run()
-        run.add_picture(logo_path, width=Inches(2))
+        run.add_picture(io.BytesIO(load_image(logo_path)), width=Inches(2))
     
     # Add company name if provided
     if company_name:
@@ -230,27 +281,13 @@ def create_change_log_table(doc, author):
     data_rows = [["1.0", "Initial Draft", current_date, author]]
     return create_general_table(doc, headers, data_rows)
 
-def create_timeline_table(doc, timeline_data):
+def create_timeline_table(doc, costing):
     # Create headers
     headers = ["Milestone", "Description", "Estimated Time (Days)"]
-    data_rows = []
-    total_duration = timeline_data.get("TOTAL_DURATION", "")
-
-    # Process timeline data
-    if timeline_data and isinstance(timeline_data, dict):
-        # Extract milestone information from the MILESTONES list in the data
-            for i, milestone in enumerate(timeline_data["MILESTONES"], 1):
-                if isinstance(milestone, dict):
-                    # Use ordered number as the milestone number
-                    milestone_number = str(i)
-                    description = milestone.get("DESCRIPTION", "")
-                    
-                    # Extract estimated time (strip any "days" text if present)
-                    estimated_time = milestone.get("ESTIMATED_TIME", milestone.get("ESTIMATED_TIME", ""))
-                    if isinstance(estimated_time, str):
-                        estimated_time = estimated_time.replace("days", "").replace("day", "").strip()
-                    
-                    data_rows.append([milestone_number, description, estimated_time])
+    data_rows = [
+        [str(i), milestone.description, format_days(milestone.days)]
+        for i, milestone in enumerate(costing.milestones, 1)
+    ]
     
     # If no valid data rows were created, add placeholders
     if not data_rows:
@@ -261,40 +298,19 @@ def create_timeline_table(doc, timeline_data):
             ]
     
     create_general_table(doc, headers, data_rows)
-    add_body_text(doc, f"\nTotal Duration: {total_duration}")
-
-def create_budget_table(doc, budget_data, total_duration):
-    if isinstance(total_duration, str):
-        total_duration = total_duration.replace("days", "").replace("day", "").strip()
-    try:
-        time = int(str(total_duration).strip()) if total_duration else 1
-    except (ValueError, TypeError):
-        time = 1
+    add_body_text(doc, f"\nTotal Duration: {format_days(costing.total_days)} days")
 
-    day_rate = 1600
-    cost = time * day_rate
+def create_budget_table(doc, costing):
+    # Every figure is precomputed by costing.compute_costing
     headers = ["Category", "Time (Days)", "Day Rate", "Cost ($)"]
-    data_rows = [["Developer Effort", str(time), str(day_rate), str(cost)]]
-    additional_costs = budget_data.get("ADDITIONAL_COSTS", [])
-    total_cost = cost
-     
-    # Add additional costs if any
-    if additional_costs and isinstance(additional_costs, list):
-        for cost_item in additional_costs:
-            if isinstance(cost_item, dict):
-                category = cost_item.get("CATEGORY", "")
-                amount = cost_item.get("AMOUNT", "")
-                if category and amount:
-                    try:
-                        amount = float(amount)
-                        total_cost += amount
-                        data_rows.append([category, "", "", str(amount)])
-                    except ValueError:
-                        continue
+    data_rows = [
+        [line.category, format_days(line.days), format_money(line.day_rate), format_money(line.cost)]
+        for line in costing.lines
+    ]
 
     # Add total and GST rows
-    data_rows.append(["", "", "Total Cost", str(total_cost)])
-    data_rows.append(["", "", "+ 10% GST", str(round(total_cost * 1.1, 2))])
+    data_rows.append(["", "", "Total Cost", format_money(costing.subtotal)])
+    data_rows.append(["", "", f"+ {format_days(costing.gst_rate * 100)}% GST", format_money(costing.total)])
     create_general_table(doc, headers, data_rows)
 
 def add_delivery_team_details(doc, delivery_team_text):
@@ -308,28 +324,13 @@ def add_delivery_team_details(doc, delivery_team_text):
         print(f"Error loading deliveryteam.json: {str(e)}")
         team_members_database = {}
     
-    # Define name variations and map them to full names
-    name_variations = {
-        "Sam": "Samuel Cunningham",
-        "Sam Cunningham:": "Samuel Cunningham",
-        "Samuel": "Samuel Cunningham",
-        "Sean": "Sean Oldenburger",
-        "Lindsey": "Lindsey Hershman"
-    }
-    
     # Look for names in the document text
-    found_names = []
-    
-    if isinstance(delivery_team_text, dict) and "TEAM_MEMBERS" in delivery_team_text:
-        for member in delivery_team_text.get("TEAM_MEMBERS", []):
-            member_name = member.get("NAME", "")
-            if member_name:
-                    found_names.append(member_name)
+    found_names = [member["NAME"] for member in delivery_team_text.get("TEAM_MEMBERS", []) if member["NAME"]]
     
     # Process found names to get full names
     full_names = []
     for name in found_names:
-        full_name = name_variations.get(name, name)
+        full_name = NAME_VARIATIONS.get(name, name)
         if full_name not in full_names:
             full_names.append(full_name)
     
@@ -356,7 +357,7 @@ def add_delivery_team_details(doc, delivery_team_text):
                 image_name = member_info.get("IMAGE", "")
                 image_path = os.path.join(IMAGES_DIR, image_name)
                 if os.path.exists(image_path):
-                    img_paragraph.add_run().add_picture(image_path, width=Inches(1.3))
+                    img_paragraph.add_run().add_picture(io.BytesIO(load_image(image_path)), width=Inches(1.3))
                     print(f"Added team member image: {image_path}")
                 else:
                     print(f"Team member image not found: {image_path}")
@@ -403,11 +404,11 @@ def add_past_projects_section(doc, past_projects_text):
         project_descriptions = {}
     
     # Display past projects with descriptions
-    if isinstance(past_projects_text, dict) and "PAST_PROJECTS" in past_projects_text:
+    if "PAST_PROJECTS" in past_projects_text:
         past_projects = past_projects_text["PAST_PROJECTS"]
-        if past_projects and len(past_projects) > 0:
+        if past_projects:
             for project in past_projects:
-                project_name = project.get("PROJECT_NAME", "")
+                project_name = project["PROJECT_NAME"]
                 matching_key = None
                 description = ""
                 for key in project_descriptions:
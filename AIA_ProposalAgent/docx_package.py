@@ -0,0 +1,163 @@
+import os
+import io
+import zipfile
+import hashlib
+import posixpath
+from lxml import etree
+
+# Post-processing for the .docx bytes written by create_word_doc. python-docx saves the whole
+# default template with default zip settings, so the package carries parts and styles the
+# proposal never uses. This rewrites the package with identical media stored once, unused
+# template parts and styles removed, and a tuned deflate level.
+
+# Deflate level for every part except JPEGs, which don't shrink any further and are stored as is
+DOCX_COMPRESS_LEVEL = int(os.getenv("DOCX_COMPRESS_LEVEL", 9))
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+W = f"{{{W_NS}}}"
+
+# Template parts nothing in a generated proposal depends on: the Word 2010 duplicate of
+# styles.xml, the template's preview thumbnail and its custom XML data store
+UNUSED_RELATIONSHIP_TYPES = {
+    "http://schemas.microsoft.com/office/2007/relationships/stylesWithEffects",
+    "http://schemas.openxmlformats.org/package/2006/relationships/metadata/thumbnail",
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/customXml",
+}
+
+MEDIA_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".emf", ".wmf", ".tiff")
+STORED_EXTENSIONS = (".jpg", ".jpeg")
+
+# Elements whose w:val names a style
+STYLE_REFERENCES = ("pStyle", "rStyle", "tblStyle", "numStyleLink", "styleLink")
+# Links between styles, a kept style keeps the styles it points at
+STYLE_LINKS = ("basedOn", "link", "next")
+
+def rels_path_for(part_name):
+    # word/document.xml -> word/_rels/document.xml.rels
+    directory, name = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+def source_dir_for(rels_name):
+    # word/_rels/document.xml.rels -> word
+    return posixpath.dirname(posixpath.dirname(rels_name))
+
+def resolve_target(rels_name, target):
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(source_dir_for(rels_name), target))
+
+def relative_target(rels_name, part_name):
+    return posixpath.relpath(part_name, source_dir_for(rels_name) or ".")
+
+def drop_part(parts, part_name):
+    # Remove a part, its own relationships and everything only it referred to
+    parts.pop(part_name, None)
+    rels_name = rels_path_for(part_name)
+    rels_xml = parts.pop(rels_name, None)
+    if rels_xml is None:
+        return
+    for relationship in etree.fromstring(rels_xml):
+        if relationship.get("TargetMode") != "External":
+            drop_part(parts, resolve_target(rels_name, relationship.get("Target")))
+
+def strip_unused_parts(parts):
+    for rels_name in [name for name in parts if name.endswith(".rels")]:
+        if rels_name not in parts:
+            continue
+        root = etree.fromstring(parts[rels_name])
+        removed = False
+        for relationship in list(root):
+            if relationship.get("Type") in UNUSED_RELATIONSHIP_TYPES:
+                root.remove(relationship)
+                drop_part(parts, resolve_target(rels_name, relationship.get("Target")))
+                removed = True
+        if removed:
+            parts[rels_name] = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+def dedupe_media(parts):
+    # python-docx already reuses an image part when the same file is added twice, this also
+    # catches identical images that reach the package under different names
+    canonical, duplicates = {}, {}
+    for name in sorted(parts):
+        if name.lower().endswith(MEDIA_EXTENSIONS):
+            digest = hashlib.sha256(parts[name]).hexdigest()
+            if digest in canonical:
+                duplicates[name] = canonical[digest]
+            else:
+                canonical[digest] = name
+    if not duplicates:
+        return
+
+    for rels_name in [name for name in parts if name.endswith(".rels")]:
+        root = etree.fromstring(parts[rels_name])
+        changed = False
+        for relationship in root:
+            if relationship.get("TargetMode") == "External":
+                continue
+            target = resolve_target(rels_name, relationship.get("Target"))
+            if target in duplicates:
+                relationship.set("Target", relative_target(rels_name, duplicates[target]))
+                changed = True
+        if changed:
+            parts[rels_name] = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    for name in duplicates:
+        del parts[name]
+
+def strip_unused_styles(parts, styles_name="word/styles.xml"):
+    # Keep default styles, styles referenced from any word/ XML part and whatever those are based on
+    if styles_name not in parts:
+        return
+    used = set()
+    for name, data in parts.items():
+        if name.startswith("word/") and name.endswith(".xml") and name != styles_name and b"w:val" in data:
+            for element in etree.fromstring(data).iter(*(W + tag for tag in STYLE_REFERENCES)):
+                used.add(element.get(W + "val"))
+
+    root = etree.fromstring(parts[styles_name])
+    styles = {style.get(W + "styleId"): style for style in root.iter(W + "style")}
+    pending = [style_id for style_id, style in styles.items() if style.get(W + "default") == "1" or style_id in used]
+    keep = set()
+    while pending:
+        style_id = pending.pop()
+        if style_id in keep or style_id not in styles:
+            continue
+        keep.add(style_id)
+        for tag in STYLE_LINKS:
+            link = styles[style_id].find(W + tag)
+            if link is not None:
+                pending.append(link.get(W + "val"))
+
+    for style_id, style in styles.items():
+        if style_id not in keep:
+            style.getparent().remove(style)
+    parts[styles_name] = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+def clean_content_types(parts):
+    # Overrides for parts that were removed would make Word report the file as damaged
+    root = etree.fromstring(parts["[Content_Types].xml"])
+    for override in root.findall(f"{{{CONTENT_TYPES_NS}}}Override"):
+        if override.get("PartName").lstrip("/") not in parts:
+            root.remove(override)
+    parts["[Content_Types].xml"] = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+def optimise_docx(data, compresslevel=DOCX_COMPRESS_LEVEL):
+    # Takes and returns .docx bytes
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        names = package.namelist()
+        parts = {name: package.read(name) for name in names}
+
+    strip_unused_parts(parts)
+    dedupe_media(parts)
+    strip_unused_styles(parts)
+    clean_content_types(parts)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as package:
+        # [Content_Types].xml stays first, as in the original package
+        for name in [name for name in names if name in parts]:
+            if name.lower().endswith(STORED_EXTENSIONS):
+                package.writestr(name, parts[name], compress_type=zipfile.ZIP_STORED)
+            else:
+                package.writestr(name, parts[name], compress_type=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+    return buffer.getvalue()
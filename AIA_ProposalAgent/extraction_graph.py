@@ -0,0 +1,114 @@
+import os
+import time
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .prompt_func import *
+from .docx_func import render_text_fragment
+
+# Maps each projectinfo.json section to the extractor that fills it, in run order
+SECTION_EXTRACTORS = {
+    "BASIC_INFO": extract_basic_info,
+    "PLAN": extract_plan,
+    "SCOPE": extract_scope,
+    "CONTRACT_STRUCTURE": extract_contract_structure,
+    "KEY_DELIVERABLES": extract_key_deliverables,
+    "ASSUMPTIONS": extract_assumptions,
+    "TIMELINE": extract_timeline,
+    "BUDGET": extract_budget,
+    "DELIVERY_TEAM": extract_delivery_team,
+    "PAST_PROJECTS": extract_past_projects,
+}
+
+# The upstream fields each section actually reads. None passes the whole upstream section.
+# Sections not listed here only depend on the input text and can all run at once.
+SECTION_DEPENDENCIES = {
+    "BUDGET": {"TIMELINE": ["TOTAL_DURATION"]},
+    "PAST_PROJECTS": {"BASIC_INFO": ["PROJECT DESCRIPTION"]},
+}
+
+# Free text sections that can be streamed and rendered to DOCX while the model is still writing
+STREAMED_SECTIONS = {
+    "PLAN": stream_plan,
+}
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", len(SECTION_EXTRACTORS)))
+
+def get_dependents(sections):
+    # Returns the given sections plus everything downstream of them, in run order
+    affected = set(sections)
+    changed = True
+    while changed:
+        changed = False
+        for section, upstream in SECTION_DEPENDENCIES.items():
+            if section not in affected and affected.intersection(upstream):
+                affected.add(section)
+                changed = True
+    return [section for section in SECTION_EXTRACTORS if section in affected]
+
+def build_context(section, project_data):
+    # Pick out only the upstream fields the section needs
+    context = {}
+    for upstream, fields in SECTION_DEPENDENCIES.get(section, {}).items():
+        value = project_data.get(upstream)
+        if fields is not None and isinstance(value, dict):
+            value = {field: value.get(field, "Not specified") for field in fields}
+        context[upstream] = value
+    return context
+
+def stream_section(section, document_text, context, fragments):
+    # Render the section into a DOCX fragment as it streams, returning the full text for project_data.
+    # If the stream fails the partial text is dropped and the section is extracted without streaming.
+    try:
+        text, fragment = render_text_fragment(STREAMED_SECTIONS[section](document_text, context))
+    except Exception as e:
+        print(f"Streaming {section} failed ({type(e).__name__}), extracting it without streaming")
+        return SECTION_EXTRACTORS[section](document_text, context)
+    if not text:
+        return "Not specified"
+    fragments[section] = fragment
+    return text
+
+def run_section(section, func, args, timings):
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        if timings is not None:
+            timings[section] = round(time.perf_counter() - started, 3)
+
+def run_extraction_graph(document_text, project_data, sections=None, fragments=None, timings=None):
+    # Run the extractors as a DAG, each one starting as soon as its upstream sections are done.
+    # Upstream sections outside of `sections` are read from project_data as already extracted.
+    # If a fragments dict is given, streamed sections are also rendered into it as they arrive,
+    # and if a timings dict is given each section's wall time in seconds is recorded in it.
+    pending = [section for section in (sections if sections is not None else SECTION_EXTRACTORS)]
+    waiting_on = {
+        section: {upstream for upstream in SECTION_DEPENDENCIES.get(section, {}) if upstream in pending}
+        for section in pending
+    }
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS) as executor:
+        while pending or running:
+            for section in [s for s in pending if not waiting_on[s]]:
+                pending.remove(section)
+                context = build_context(section, project_data)
+                if fragments is not None and section in STREAMED_SECTIONS:
+                    func, args = stream_section, (section, document_text, context, fragments)
+                else:
+                    func, args = SECTION_EXTRACTORS[section], (document_text, context)
+                # Each section runs in a copy of the caller's context so token usage is tracked per run
+                future = executor.submit(copy_context().run, run_section, section, func, args, timings)
+                running[future] = section
+
+            if not running:
+                raise ValueError(f"Circular section dependencies: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                section = running.pop(future)
+                project_data[section] = future.result()
+                for upstream in waiting_on.values():
+                    upstream.discard(section)
+
+    return project_data
@@ -0,0 +1,166 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# A call that is still running when it passes the given percentile of its section's recent
+# latencies gets a duplicate request, and whichever gives a valid answer first is used. Off by default.
+#   LLM_HEDGE                 true to enable hedging
+#   LLM_HEDGE_PERCENTILE      latency percentile, per section, after which a duplicate is sent
+#   LLM_HEDGE_MIN_SAMPLES     calls a section needs before it is hedged
+#   LLM_HEDGE_BUDGET          most duplicates sent, as a fraction of the recent calls
+#   AZURE_OPENAI_HEDGE_DEPLOYMENT  deployment the duplicates go to, defaults to the section's own
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 0.95))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", 0.1))
+HEDGE_MODEL = os.getenv("AZURE_OPENAI_HEDGE_DEPLOYMENT")
+
+# Latencies kept per section, and calls the budget is counted over
+LATENCY_WINDOW = 200
+BUDGET_WINDOW = 500
+
+_lock = threading.Lock()
+_latencies = {}
+# One dict per call, marked when that call was hedged
+_recent_calls = deque(maxlen=BUDGET_WINDOW)
+_counters = {"calls": 0, "hedged": 0, "hedge_won": 0, "over_budget": 0, "failed": 0}
+
+# Both requests of a hedged call run here, so the caller can wait on whichever finishes first.
+# The hedge delay is counted from when the first request starts, time spent queued for a
+# connection doesn't make a call look slow.
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_MAX_CONNECTIONS", 20)), thread_name_prefix="hedge")
+
+def record_latency(section, seconds):
+    with _lock:
+        _latencies.setdefault(section or "OTHER", deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+def hedge_delay(section):
+    # Seconds to wait before sending a duplicate, None until the section has enough samples
+    with _lock:
+        latencies = sorted(_latencies.get(section or "OTHER", ()))
+    if len(latencies) < LLM_HEDGE_MIN_SAMPLES:
+        return None
+    return latencies[int(LLM_HEDGE_PERCENTILE * (len(latencies) - 1))]
+
+def take_budget(call):
+    # True if a duplicate can be sent for the call without going over the budget
+    with _lock:
+        if sum(recent["hedged"] for recent in _recent_calls) + 1 > LLM_HEDGE_BUDGET * len(_recent_calls):
+            _counters["over_budget"] += 1
+            return False
+        call["hedged"] = True
+        _counters["hedged"] += 1
+        return True
+
+def timed(create, section, *args, started_event=None, **kwargs):
+    # Failures and timeouts are recorded too, leaving them out would make the percentiles too low
+    if started_event is not None:
+        started_event.set()
+    started = time.perf_counter()
+    try:
+        return create(*args, **kwargs)
+    finally:
+        record_latency(section, time.perf_counter() - started)
+
+def is_valid(future, validate):
+    if future.exception() is not None:
+        return False
+    if validate is None:
+        return True
+    try:
+        validate(future.result())
+        return True
+    except Exception:
+        return False
+
+def hedged_create(create, model, messages, section=None, validate=None, **kwargs):
+    """
+    Call create(model, messages, **kwargs), sending a duplicate to HEDGE_MODEL if the call is
+    slower than LLM_HEDGE_PERCENTILE of the section's recent calls and the budget allows it.
+
+    The first request to return a valid response is used. A duplicate that hasn't started is
+    cancelled, one already in flight can't be interrupted, so it finishes in the background and
+    its response is dropped.
+
+    :param create: Backend create function
+    :param model: Deployment of the first request
+    :param messages: Chat messages
+    :param section: Section the latencies are tracked under
+    :param validate: Called with a completion of a hedged call, raises if it can't be used
+    :return: Completion from whichever request answered first with a valid response
+    """
+    if kwargs.get("stream"):
+        # Streams are read as they arrive, so they are neither timed nor duplicated
+        return create(model, messages, **kwargs)
+    if not LLM_HEDGE:
+        return timed(create, section, model, messages, **kwargs)
+
+    call = {"hedged": False}
+    with _lock:
+        _counters["calls"] += 1
+        _recent_calls.append(call)
+    delay = hedge_delay(section)
+    if delay is None:
+        return timed(create, section, model, messages, **kwargs)
+
+    started = threading.Event()
+    primary = _executor.submit(timed, create, section, model, messages, started_event=started, **kwargs)
+    # Wait for the first request to start, or finish if it was cancelled, before timing it
+    while not started.wait(0.05) and not primary.done():
+        pass
+    done, _ = wait([primary], timeout=delay)
+    if done or not take_budget(call):
+        return primary.result()
+
+    print(f"{section or 'Request'} slower than {delay:.1f}s, sending a hedged request to {HEDGE_MODEL or model}")
+    hedge = _executor.submit(timed, create, section, HEDGE_MODEL or model, messages, **kwargs)
+    pending = {primary, hedge}
+    # Error of each request that finished without a valid response, None if the response was invalid
+    finished = {}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if is_valid(future, validate):
+                for other in pending:
+                    other.cancel()
+                if future is hedge:
+                    with _lock:
+                        _counters["hedge_won"] += 1
+                return future.result()
+            finished[future] = future.exception()
+    with _lock:
+        _counters["failed"] += 1
+    # An invalid response is returned so the caller reports it, otherwise the first request's error is raised
+    for future in (primary, hedge):
+        if finished[future] is None:
+            return future.result()
+    raise finished[primary]
+
+def get_hedge_metrics():
+    # Hedge counters and rates with each section's current latency percentiles
+    with _lock:
+        counters = dict(_counters)
+        latencies = {section: sorted(values) for section, values in _latencies.items()}
+
+    def percentile(values, fraction):
+        return round(values[int(fraction * (len(values) - 1))], 3)
+
+    return {
+        "enabled": LLM_HEDGE,
+        "percentile": LLM_HEDGE_PERCENTILE,
+        "budget": LLM_HEDGE_BUDGET,
+        **counters,
+        "hedge_rate": round(counters["hedged"] / counters["calls"], 4) if counters["calls"] else 0.0,
+        "hedge_win_rate": round(counters["hedge_won"] / counters["hedged"], 4) if counters["hedged"] else 0.0,
+        "sections": {
+            section: {
+                "samples": len(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "hedge_after": percentile(values, LLM_HEDGE_PERCENTILE) if len(values) >= LLM_HEDGE_MIN_SAMPLES else None
+            }
+            for section, values in latencies.items() if values
+        }
+    }
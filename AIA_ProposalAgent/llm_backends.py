@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from functools import cache
+from openai import AzureOpenAI, OpenAI, DefaultHttpxClient
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Which backend serves chat completions:
+#   azure   Azure OpenAI (default)
+#   openai  any OpenAI-compatible server, e.g. a local vLLM or llama.cpp server
+#   replay  no network, answers from recorded responses or from the response schema
+LLM_BACKEND = os.getenv("LLM_BACKEND", "azure").lower()
+
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", "https://aia-chat.openai.azure.com/")
+AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://localhost:8000/v1")
+# Local servers usually serve a single model under their own name, which replaces every routed deployment
+OPENAI_MODEL = os.getenv("OPENAI_MODEL")
+
+# Each backend has its own connection pool and a cap on requests in flight
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 10))
+
+# Responses from a live backend are appended here when set, for the replay backend to serve later
+LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH")
+LLM_REPLAY_PATH = os.getenv("LLM_REPLAY_PATH")
+# Simulated response time for the replay backend
+LLM_REPLAY_LATENCY_MS = float(os.getenv("LLM_REPLAY_LATENCY_MS", 0))
+
+def request_key(messages, response_format=None):
+    # Same messages and schema give the same key whichever deployment served them
+    payload = json.dumps({"messages": messages, "response_format": response_format}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+_record_lock = threading.Lock()
+
+def record_response(key, content, usage):
+    if not LLM_RECORD_PATH:
+        return
+    line = json.dumps({
+        "key": key,
+        "content": content,
+        "usage": {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens} if usage else None
+    })
+    with _record_lock:
+        with open(LLM_RECORD_PATH, "a") as file:
+            file.write(line + "\n")
+
+class OpenAIBackend:
+    """
+    Azure OpenAI or an OpenAI-compatible server, both through the openai SDK.
+
+    :param name: Backend name, for logs
+    :param client: openai client holding the backend's connection pool
+    :param model_override: Model used in place of every routed deployment
+    """
+
+    def __init__(self, name, client, model_override=None):
+        self.name = name
+        self.client = client
+        self.model_override = model_override
+        self.semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+    def create(self, model, messages, timeout, max_retries=None, **kwargs):
+        # Same arguments as chat.completions.create, plus the per-request timeout and retries
+        options = {"timeout": timeout}
+        if max_retries is not None:
+            options["max_retries"] = max_retries
+        key = request_key(messages, kwargs.get("response_format")) if LLM_RECORD_PATH else None
+
+        self.semaphore.acquire()
+        try:
+            result = self.client.with_options(**options).chat.completions.create(
+                model=self.model_override or model,
+                messages=messages,
+                **kwargs
+            )
+        except BaseException:
+            self.semaphore.release()
+            raise
+        if kwargs.get("stream"):
+            # The slot is held until the stream is consumed
+            return self._stream(result, key)
+        self.semaphore.release()
+        if key:
+            record_response(key, result.choices[0].message.content, result.usage)
+        return result
+
+    def _stream(self, stream, key):
+        content, usage = [], None
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content.append(chunk.choices[0].delta.content)
+                usage = getattr(chunk, "usage", None) or usage
+                yield chunk
+        finally:
+            self.semaphore.release()
+        if key:
+            record_response(key, "".join(content), usage)
+
+def example_from_schema(schema, definitions=None):
+    # Smallest valid instance of a strict JSON schema, for requests that were never recorded
+    definitions = definitions if definitions is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return example_from_schema(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {name: example_from_schema(value, definitions) for name, value in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        return [example_from_schema(schema.get("items", {}), definitions)]
+    if schema_type == "integer":
+        return 1
+    if schema_type == "number":
+        return 1.0
+    if schema_type == "boolean":
+        return False
+    return "Not specified"
+
+class ReplayBackend:
+    """
+    Deterministic backend with no network. Requests are answered from a file written with
+    LLM_RECORD_PATH, or with a placeholder that matches the requested schema.
+
+    :param path: JSONL file of recorded responses
+    """
+
+    name = "replay"
+
+    def __init__(self, path=None):
+        self.recordings = {}
+        if path:
+            try:
+                with open(path, "r") as file:
+                    for line in file:
+                        if line.strip():
+                            recording = json.loads(line)
+                            self.recordings[recording["key"]] = recording
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                print(f"Error loading replay file: {str(e)}")
+        self.semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+    def respond(self, messages, response_format):
+        recording = self.recordings.get(request_key(messages, response_format))
+        if recording:
+            return recording["content"], recording.get("usage")
+        if response_format:
+            content = json.dumps(example_from_schema(response_format["json_schema"]["schema"]))
+        else:
+            content = "Not specified"
+        return content, None
+
+    def create(self, model, messages, timeout, max_retries=None, **kwargs):
+        content, usage = self.respond(messages, kwargs.get("response_format"))
+        usage = dict(usage or {"prompt_tokens": 0, "completion_tokens": 0})
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        with self.semaphore:
+            time.sleep(LLM_REPLAY_LATENCY_MS / 1000)
+            if kwargs.get("stream"):
+                return iter(self._chunks(model, content, usage))
+            return ChatCompletion.model_validate({
+                "id": "replay",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": usage
+            })
+
+    def _chunks(self, model, content, usage):
+        base = {"id": "replay", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        for start in range(0, len(content), 20):
+            delta = {"content": content[start:start + 20]}
+            yield ChatCompletionChunk.model_validate({**base, "choices": [{"index": 0, "delta": delta}]})
+        yield ChatCompletionChunk.model_validate({**base, "choices": [], "usage": usage})
+
+def http_client():
+    limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+    return DefaultHttpxClient(limits=limits)
+
+@cache
+def get_backend():
+    """
+    Build the backend chosen by LLM_BACKEND once per process.
+
+    :return: Backend with a create(model, messages, timeout, max_retries, **kwargs) method
+    """
+    if LLM_BACKEND == "replay":
+        return ReplayBackend(LLM_REPLAY_PATH)
+    if LLM_BACKEND == "openai":
+        client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY", "not-needed"),
+            base_url=OPENAI_BASE_URL,
+            http_client=http_client()
+        )
+        return OpenAIBackend("openai", client, OPENAI_MODEL)
+    if LLM_BACKEND != "azure":
+        raise ValueError(f"Unknown LLM_BACKEND: {LLM_BACKEND}")
+    client = AzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=AZURE_OPENAI_API_VERSION,
+        azure_endpoint=AZURE_OPENAI_ENDPOINT,
+        http_client=http_client()
+    )
+    return OpenAIBackend("azure", client)
@@ -0,0 +1,171 @@
+import os
+import re
+import json
+from datetime import datetime
+from functools import cache
+from .docx_func import NAME_VARIATIONS, DATA_DIR
+from .costing import parse_decimal
+
+# Fast local pass over the input that fills fields which appear literally in the text,
+# so the LLM only has to be asked for what is left. Every function only returns a field
+# when the match is unambiguous.
+
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z'-]*")
+# Sentences end at a full stop followed by a space, so amounts like $1,200.50 stay whole
+SENTENCE_PATTERN = re.compile(r"(?:[^.!?\n]|\.(?=\S))+")
+
+MONTHS = r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+DATE_PATTERN = re.compile(rf"""
+    \b(?:
+        (?P<iso>\d{{4}}-\d{{1,2}}-\d{{1,2}})
+      | (?P<numeric>\d{{1,2}}/\d{{1,2}}/\d{{4}})
+      | (?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month>{MONTHS})\.?,?\s+(?P<year>\d{{4}})
+      | (?P<month_first>{MONTHS})\.?\s+(?P<day_second>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<year_second>\d{{4}})
+    )\b""", re.IGNORECASE | re.VERBOSE)
+# Dates are written the way the rendered proposal writes them, Australian day/month/year
+DATE_FORMAT = "%d/%m/%Y"
+START_WORDS = re.compile(r"\b(?:start\w*|begin\w*|commenc\w*|kick[- ]?off|from)\b", re.IGNORECASE)
+END_WORDS = re.compile(r"\b(?:end\w*|finish\w*|complet\w*|due|deliver\w*|deadline|until|to)\b", re.IGNORECASE)
+
+MONEY_PATTERN = re.compile(r"(?:AUD\s?|A?\$\s?)(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?\s?(?:k|K|m|M)?\b")
+TOTAL_WORDS = re.compile(r"\b(?:total|budget|fixed fee|quote[ds]?|overall)\b", re.IGNORECASE)
+
+# Up to four capitalised words before the suffix, "Pty" is always part of the suffix
+COMPANY_PATTERN = re.compile(r"\b((?:(?!Pty\b)[A-Z][\w&'-]*\s){0,3}(?!Pty\b)[A-Z][\w&'-]*)\s(?:Pty\.?\s?Ltd\.?|Ltd\.?|Limited|Inc\.?|LLC|Group)(?!\w)")
+
+PROJECT_MANAGER_WORDS = re.compile(r"\b(?:project manag\w*|PM)\b", re.IGNORECASE)
+AUTHOR_WORDS = re.compile(r"\b(?:author\w*|written by|prepared by|drafted by)\b", re.IGNORECASE)
+
+@cache
+def get_name_trie():
+    # Word-level trie of every known name and alias, leaves hold the full name used in deliveryteam.json
+    aliases = dict(NAME_VARIATIONS)
+    try:
+        with open(os.path.join(DATA_DIR, "deliveryteam.json"), 'r') as file:
+            for name in json.load(file)["TEAM_MEMBERS"]:
+                aliases.setdefault(name, NAME_VARIATIONS.get(name, name))
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading deliveryteam.json: {str(e)}")
+
+    trie = {}
+    for alias, full_name in aliases.items():
+        node = trie
+        for word in alias.split():
+            node = node.setdefault(word, {})
+        node[None] = full_name
+    return trie
+
+def find_team_members(document_text):
+    # Full names of known team members mentioned literally in the input, in order of appearance.
+    # The longest alias wins, so "Sam Cunningham" is one match rather than "Sam" followed by a stray word.
+    trie = get_name_trie()
+    words = WORD_PATTERN.findall(document_text)
+    found = []
+    i = 0
+    while i < len(words):
+        node, match, end = trie, None, i
+        for j in range(i, len(words)):
+            node = node.get(words[j])
+            if node is None:
+                break
+            if None in node:
+                match, end = node[None], j
+        if match:
+            if match not in found:
+                found.append(match)
+            i = end + 1
+        else:
+            i += 1
+    return found
+
+def parse_date(match):
+    try:
+        if match.group("iso"):
+            return datetime.strptime(match.group("iso"), "%Y-%m-%d")
+        if match.group("numeric"):
+            return datetime.strptime(match.group("numeric"), DATE_FORMAT)
+        if match.group("day"):
+            day, month, year = match.group("day"), match.group("month"), match.group("year")
+        else:
+            day, month, year = match.group("day_second"), match.group("month_first"), match.group("year_second")
+        return datetime.strptime(f"{day} {month[:3]} {year}", "%d %b %Y")
+    except ValueError:
+        return None
+
+def find_dates(document_text):
+    # Start and end dates, decided by the nearest start or end word before each date on the same line
+    start_dates, end_dates = set(), set()
+    for line in document_text.splitlines():
+        previous_end = 0
+        for match in DATE_PATTERN.finditer(line):
+            date = parse_date(match)
+            if date is None:
+                continue
+            before = line[previous_end:match.start()]
+            previous_end = match.end()
+            start_word = max((m.end() for m in START_WORDS.finditer(before)), default=-1)
+            end_word = max((m.end() for m in END_WORDS.finditer(before)), default=-1)
+            if start_word > end_word:
+                start_dates.add(date)
+            elif end_word > start_word:
+                end_dates.add(date)
+
+    dates = {}
+    if len(start_dates) == 1:
+        dates["START DATE"] = start_dates.pop().strftime(DATE_FORMAT)
+    if len(end_dates) == 1:
+        dates["END DATE"] = end_dates.pop().strftime(DATE_FORMAT)
+    return dates
+
+def find_total_cost(document_text):
+    # The one dollar amount mentioned alongside a word like "total" or "budget", if there is exactly one
+    amounts = set()
+    for sentence in SENTENCE_PATTERN.findall(document_text):
+        if not TOTAL_WORDS.search(sentence):
+            continue
+        # Parsed the same way as the costing, so "$12.5k" is 12,500 in both
+        amounts.update(parse_decimal(match.group(0)) for match in MONEY_PATTERN.finditer(sentence))
+    if len(amounts) != 1:
+        return None
+    amount = amounts.pop()
+    return f"${amount:,.2f}" if amount % 1 else f"${amount:,.0f}"
+
+def find_company_name(document_text):
+    # A capitalised word that starts a sentence may or may not be part of the name ("Yesterday Acme Pty
+    # Ltd asked"), so those matches only count if they end in the one name found elsewhere in the text
+    names, sentence_starts = set(), set()
+    for match in COMPANY_PATTERN.finditer(document_text):
+        name = match.group(0).strip().rstrip(".")
+        before = document_text[:match.start()].rstrip(" \t")
+        if " " in match.group(1) and (not before or before[-1] in ".!?:\n"):
+            sentence_starts.add(name)
+        else:
+            names.add(name)
+    if len(names) != 1:
+        return None
+    name = names.pop()
+    if any(other != name and not other.endswith(f" {name}") for other in sentence_starts):
+        return None
+    return name
+
+def find_role(document_text, role_words):
+    # The team member named in the sentences that mention a role, if they all agree on one person
+    people = set()
+    for sentence in SENTENCE_PATTERN.findall(document_text):
+        if role_words.search(sentence):
+            people.update(find_team_members(sentence))
+    return people.pop() if len(people) == 1 else None
+
+def extract_local_basic_info(document_text):
+    # The BASIC_INFO fields that could be read straight from the input
+    basic_info = find_dates(document_text)
+    company_name = find_company_name(document_text)
+    if company_name:
+        basic_info["COMPANY NAME"] = company_name
+    project_manager = find_role(document_text, PROJECT_MANAGER_WORDS)
+    if project_manager:
+        basic_info["PROJECT MANAGER"] = project_manager
+    author = find_role(document_text, AUTHOR_WORDS)
+    if author:
+        basic_info["AUTHOR"] = author
+    return basic_info
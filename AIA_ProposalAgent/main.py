@@ -1,22 +1,53 @@
 from .prompt_func import *
 from .docx_func import *
-from .projectinfo import load_project_info
+from .projectinfo import load_project_info, get_empty_project_info
+from .extraction_graph import SECTION_EXTRACTORS, run_extraction_graph, get_dependents
+from .costing import compute_costing
+from .near_duplicates import changed_sections
+from .schemas import validate_section_values
 
-def extract_project_info(document_text):
-  extract_basic_info(document_text)
-  extract_plan(document_text)
-  extract_scope(document_text)
-  extract_contract_structure(document_text)
-  extract_key_deliverables(document_text)
-  extract_assumptions(document_text)
-  extract_timeline(document_text)
-  extract_budget(document_text)
-  extract_delivery_team(document_text)
-  extract_past_projects(document_text)
+def extract_project_info(document_text, sections=None, project_data=None, fragments=None, timings=None):
+  # Runs every extractor unless a subset of sections is given. State is kept in memory per request,
+  # nothing is written to the shared projectinfo.json. Pass a fragments dict to have streamed
+  # sections rendered as they arrive, then hand it to create_word_doc.
+  return run_extraction_graph(document_text, project_data or get_empty_project_info(), sections, fragments, timings)
 
-def create_word_doc(filename="project_proposal.docx"):
+def regenerate_project_info(document_text, project_data, sections=None, notes="", values=None, timings=None):
+  # Re-run only the affected sections on top of a cached project state, reusing everything else.
+  # Notes without sections or values re-run what an input edited the same way would, the sections
+  # the notes mention and those summarising the whole input, see near_duplicates.
+  sections = list(sections or [])
+  values = values or {}
+  revised_text = f"{document_text}\n\nAdditional notes:\n{notes}" if notes else document_text
+  if notes and not sections and not values:
+    noted = changed_sections(document_text, revised_text)
+    sections = [section for section in SECTION_EXTRACTORS if section in noted]
+  unknown = [section for section in sections + list(values) if section not in SECTION_EXTRACTORS]
+  if unknown:
+    raise ValueError(f"Unknown sections: {', '.join(unknown)}")
+
+  # Values are rendered as given, so they must have the same form as extracted sections
+  project_data = dict(project_data, **validate_section_values(values))
+  # Anything downstream of a changed section is stale too, replaced values themselves are kept
+  affected = [section for section in get_dependents(sections + list(values)) if section not in values or section in sections]
+
+  return revised_text, extract_project_info(revised_text, affected, project_data, timings=timings)
+
+def extract_revised_project_info(document_text, previous_text, project_data, fragments=None, timings=None):
+  # Extract a new input that is a revision of previous_text, re-running only the sections whose input
+  # sentences changed and everything downstream of them. Sections missing from the earlier run are
+  # extracted again too. Returns the re-run sections and the project data.
+  changed = changed_sections(previous_text, document_text)
+  changed.update(section for section in SECTION_EXTRACTORS if project_data.get(section) is None)
+  affected = get_dependents(changed)
+  return affected, extract_project_info(document_text, affected, dict(project_data), fragments, timings)
+
+def create_word_doc(filename="project_proposal.docx", project_data=None, fragments=None):
+    # filename can also be a file-like object such as io.BytesIO
+    fragments = fragments or {}
     doc = Document()
-    project_data = load_project_info() 
+    if project_data is None:
+        project_data = load_project_info()
 
     create_header_table(doc, logo_path=os.path.join(IMAGES_DIR, "Logo.png"), company_name="AI Advancements", company_name_font='Calibri Bold')
         
@@ -72,20 +103,24 @@ def create_word_doc(filename="project_proposal.docx"):
     add_bullet_points_from_list(doc, deliverables)
     
     add_heading(doc, '4.0 Plan')
-    plan_text = project_data.get("PLAN", "Plan information not found")
-    add_body_text(doc, plan_text)
+    if "PLAN" in fragments:
+        # Already rendered while the plan was streaming
+        append_fragment(doc, fragments["PLAN"])
+    else:
+        plan_text = project_data.get("PLAN", "Plan information not found")
+        add_body_text(doc, plan_text)
     
     add_heading(doc, '5.0 Assumptions')
     assumptions = project_data.get("ASSUMPTIONS", ["Assumptions not found"])
     add_bullet_points_from_list(doc, assumptions)
     
+    # Durations and costs are parsed once and shared by both tables
+    costing = compute_costing(project_data)
     add_heading(doc, '6.0 Timeline')
-    timeline_data = project_data.get("TIMELINE", {"TOTAL_DURATION": "Not specified", "MILESTONES": []})
-    create_timeline_table(doc, timeline_data)
+    create_timeline_table(doc, costing)
     
     add_heading(doc, '7.0 Budget')
-    budget_data = project_data.get("BUDGET", {"TOTAL_COST": "Not specified", "ADDITIONAL_COST": []})
-    create_budget_table(doc, budget_data, timeline_data.get("TOTAL_DURATION", "1"))
+    create_budget_table(doc, costing)
     
     add_heading(doc, '\n8.0 Delivery Team')
     team_data = project_data.get("DELIVERY_TEAM", {"TEAM_MEMBERS": []})
@@ -96,4 +131,5 @@ def create_word_doc(filename="project_proposal.docx"):
     add_past_projects_section(doc, past_projects)
 
     doc.save(filename)
-    print(f"Document '{filename}' created successfully!")
+    if isinstance(filename, str):
+        print(f"Document '{filename}' created successfully!")
@@ -0,0 +1,133 @@
+import re
+import difflib
+import hashlib
+import random
+from array import array
+from functools import lru_cache
+from .local_extract import (
+    SENTENCE_PATTERN, DATE_PATTERN, MONEY_PATTERN, TOTAL_WORDS, COMPANY_PATTERN,
+    PROJECT_MANAGER_WORDS, AUTHOR_WORDS, find_team_members
+)
+
+# Inputs are often resubmitted with a line or two changed. Each stored input gets a MinHash
+# signature over its word shingles, split into LSH bands so an input similar to the new one can be
+# looked up by band without comparing against every stored input. The two inputs are then diffed
+# sentence by sentence, and only the sections whose kind of content was in the changed sentences
+# are extracted again, with everything downstream of them.
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows: inputs above roughly 0.5 similarity share a band with high probability
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed, signatures are stored and must be comparable across processes and restarts
+_random = random.Random(1729)
+PERMUTATIONS = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# What each section is extracted from. GENERAL_SECTIONS summarise the whole input, so any changed
+# sentence re-runs them on top of the sections it matches.
+SECTION_PATTERNS = {
+    "BASIC_INFO": [
+        DATE_PATTERN, COMPANY_PATTERN, PROJECT_MANAGER_WORDS, AUTHOR_WORDS,
+        re.compile(r"\b(?:client|company|customer|title|project name|start\w*|end date|kick[- ]?off)\b", re.IGNORECASE)
+    ],
+    "CONTRACT_STRUCTURE": [
+        re.compile(r"\b(?:contract\w*|fixed[- ](?:price|fee)|time and materials|t&m|retainer|payment\w*|invoic\w*|terms)\b", re.IGNORECASE)
+    ],
+    "ASSUMPTIONS": [
+        re.compile(r"\b(?:assum\w*|depend\w*|provid\w*|access|responsib\w*|risk\w*|out of scope|exclud\w*)\b", re.IGNORECASE)
+    ],
+    "TIMELINE": [
+        DATE_PATTERN,
+        re.compile(r"\b(?:\d+\s*(?:days?|weeks?|months?|hours?)|milestone\w*|timeline|duration|deadline|phase\w*|sprint\w*|schedul\w*)\b", re.IGNORECASE)
+    ],
+    "BUDGET": [
+        MONEY_PATTERN, TOTAL_WORDS,
+        re.compile(r"\b(?:cost\w*|pric\w*|rates?|fees?|licen[cs]\w*|subscription\w*|hosting|gst)\b", re.IGNORECASE)
+    ],
+    "DELIVERY_TEAM": [
+        re.compile(r"\b(?:team|developer\w*|engineer\w*|designer\w*|consultant\w*|staff\w*|resourc\w*)\b", re.IGNORECASE)
+    ],
+    "PAST_PROJECTS": [
+        re.compile(r"\b(?:past|previous\w*|similar|case stud\w*|reference\w*|portfolio)\b", re.IGNORECASE)
+    ],
+}
+GENERAL_SECTIONS = ["SCOPE", "PLAN", "KEY_DELIVERABLES", "TIMELINE"]
+
+def normalise(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def shingle_hashes(text):
+    tokens = normalise(text)
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    return [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") for shingle in shingles]
+
+@lru_cache(maxsize=64)
+def minhash_signature(text):
+    """
+    MinHash signature of the text's word shingles.
+
+    :param text: Input text
+    :return: Tuple of NUM_PERMUTATIONS integers
+    """
+    hashes = shingle_hashes(text)
+    return tuple(min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in PERMUTATIONS)
+
+def signature_bytes(signature):
+    return array("Q", signature).tobytes()
+
+def signature_from_bytes(data):
+    return tuple(array("Q", data))
+
+def band_keys(signature):
+    # One key per band, prefixed with the band number so equal rows in different bands don't collide
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(array("Q", rows).tobytes(), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+def estimate_similarity(signature, other):
+    # Fraction of matching rows estimates the Jaccard similarity of the two shingle sets
+    return sum(1 for a, b in zip(signature, other) if a == b) / len(signature)
+
+def split_sentences(text):
+    return [" ".join(sentence.split()) for sentence in SENTENCE_PATTERN.findall(text) if sentence.strip()]
+
+def changed_sentences(old_text, new_text):
+    # Sentences removed from the old input or added to the new one
+    old, new = split_sentences(old_text), split_sentences(new_text)
+    changed = []
+    for tag, old_start, old_end, new_start, new_end in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag != "equal":
+            changed.extend(old[old_start:old_end])
+            changed.extend(new[new_start:new_end])
+    return changed
+
+def sections_for_sentence(sentence):
+    sections = [section for section, patterns in SECTION_PATTERNS.items() if any(pattern.search(sentence) for pattern in patterns)]
+    if find_team_members(sentence) and "DELIVERY_TEAM" not in sections:
+        sections.append("DELIVERY_TEAM")
+    return sections + [section for section in GENERAL_SECTIONS if section not in sections]
+
+def changed_sections(old_text, new_text):
+    """
+    Sections whose input changed between two versions of an input. Dependents of these sections
+    are not included, see extraction_graph.get_dependents.
+
+    :param old_text: Input the stored sections were extracted from
+    :param new_text: New input
+    :return: Set of section names
+    """
+    sections = set()
+    for sentence in changed_sentences(old_text, new_text):
+        sections.update(sections_for_sentence(sentence))
+    return sections
@@ -25,12 +25,8 @@ def update_project_info(key, value):
     except Exception as e:
         print(f"Error updating projectinfo.json: {str(e)}")
 
-def clear_project_info():
-    # Create data directory if it doesn't exist
-    os.makedirs(DATA_DIR, exist_ok=True)
-    
-    # Clear projectinfo.json at startup
-    empty_project_info = {
+def get_empty_project_info():
+    return {
         "BASIC_INFO": {},
         "PLAN": "Not specified",
         "SCOPE": "Not specified",
@@ -52,10 +48,15 @@ def clear_project_info():
             "PAST_PROJECTS": []
         }
     }
+
+def clear_project_info():
+    # Create data directory if it doesn't exist
+    os.makedirs(DATA_DIR, exist_ok=True)
     
+    # Clear projectinfo.json at startup
     try:
         with open(PROJECT_INFO_PATH, 'w') as f:
-            json.dump(empty_project_info, f, indent=2)
+            json.dump(get_empty_project_info(), f, indent=2)
         print("Cleared projectinfo.json")
     except Exception as e:
         print(f"Error clearing projectinfo.json: {str(e)}")
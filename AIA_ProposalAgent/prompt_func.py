@@ -1,16 +1,17 @@
 import os
 import json
-from .projectinfo import update_project_info, get_example_proposals, PROJECT_INFO_PATH
+from .projectinfo import get_example_proposals
 from .ai_service import *
+from .schemas import *
+from .local_extract import find_team_members, extract_local_basic_info, find_total_cost
 
-def get_structured_response(prompt, user_input=None, structured=True):
-    # load current project state from projectinfo.json
-    try:
-      with open(PROJECT_INFO_PATH, 'r') as f:
-          current_state = json.load(f)
-          prompt += f"\n\nCurrent Project State:\n{json.dumps(current_state, indent=2)}"
-    except (FileNotFoundError, json.JSONDecodeError):
-        pass
+def get_structured_response(prompt, user_input=None, schema=None, context=None, stream=False, section=None):
+    # Returns a validated schema instance, free text if no schema is given, or None on failure.
+    # With stream=True the free text is returned as a generator of deltas instead.
+    # section picks the deployment and limits from ai_service.MODEL_ROUTES.
+    # Only the upstream fields this section depends on are passed in, not the whole project state
+    if context:
+        prompt += f"\n\nRelated Project Information:\n{json.dumps(context, indent=2)}"
     messages = []
     if user_input:
       prompt += f"\n\nInput text:\n{user_input}"
@@ -22,15 +23,17 @@ def get_structured_response(prompt, user_input=None, structured=True):
     messages.append({"role": "system", "content": prompt})
 
     try:
-        if structured:
-            return chat_structured(messages)
+        if schema is not None:
+            return chat_structured(messages, schema, section)
+        elif stream:
+            return chat_stream(messages, section)
         else:
-            return chat(messages)
+            return chat(messages, section)
     except Exception as e:
         print(f"Error: {e}")
-        return {"error": str(e)}
+        return None
 
-def extract_basic_info(document_text):
+def extract_basic_info(document_text, context=None):
     system_prompt = """
     Extract basic project information from the input text and format it as a JSON object with the following structure:
     
@@ -50,13 +53,25 @@ def extract_basic_info(document_text):
     - For any field where information is not available in the input text, use "Not specified".
     - The author and project manager is either Samuel Cunningham or Sean Oldenburger.
     - The project description should be a one sentence summary of the project.
+    - Write dates as DD/MM/YYYY.
     - Use Australian English spelling and grammar.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("BASIC_INFO", result)
-    return result
+    # Dates, company and roles written out in the input are filled locally, the LLM only gets the rest
+    known = extract_local_basic_info(document_text)
+    fields = [info.alias for info in BasicInfo.model_fields.values()]
+    remaining = frozenset(field for field in fields if field not in known)
+    if not remaining:
+        return known
+    if known:
+        schema = partial_schema(BasicInfo, remaining)
+        context = {**(context or {}), "BASIC_INFO": known}
+    else:
+        schema = BasicInfo
+    result = get_structured_response(document_text, system_prompt, schema, context=context, section="BASIC_INFO")
+    basic_info = {**(result.model_dump(by_alias=True) if result else {}), **known}
+    return {field: basic_info[field] for field in fields if field in basic_info}
 
-def extract_scope(document_text):
+def extract_scope(document_text, context=None):
     system_prompt = """
     Extract the project scope information from the input text and format it as a JSON object with the following structure:
     
@@ -87,11 +102,10 @@ def extract_scope(document_text):
     
     Use these examples to guide your json object, ensuring it contains similar sentence structure, tone, and length.
     """   
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("SCOPE", result.get("SCOPE", "Not specified"))
-    return result
+    result = get_structured_response(document_text, system_prompt, Scope, context=context, section="SCOPE")
+    return result.SCOPE if result else "Not specified"
 
-def extract_contract_structure(document_text):
+def extract_contract_structure(document_text, context=None):
     system_prompt = """
     Extract the contract structure information from the input text and format it as a JSON object with the following structure:
     
@@ -123,12 +137,10 @@ def extract_contract_structure(document_text):
     
     Use these examples to guide your json object, ensuring it contains similar sentence structure, tone, and length.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("CONTRACT_STRUCTURE", result.get("CONTRACT_STRUCTURE", "Not specified"))
-    return result
+    result = get_structured_response(document_text, system_prompt, ContractStructure, context=context, section="CONTRACT_STRUCTURE")
+    return result.CONTRACT_STRUCTURE if result else "Not specified"
 
-def extract_plan(document_text):
-    system_prompt = """
+PLAN_PROMPT = """
     Generate a plan for the project using the provided meeting notes, information and all other data provided. Output only the plan as plain text, not using any formatting.
 
     Your task is to generate the PLAN section for a proposal document prepared by an AI consulting company.
@@ -146,11 +158,16 @@ def extract_plan(document_text):
     - Only look at the plan section of the example proposals provided, ignore all other sections.
     - Do not include sections that are already covered in other parts of the proposal (e.g., scope, assumptions, etc.)
     """
-    result = get_structured_response(document_text, system_prompt, False)
-    update_project_info("PLAN", result)
-    return result
 
-def extract_key_deliverables(document_text):
+def extract_plan(document_text, context=None):
+    result = get_structured_response(document_text, PLAN_PROMPT, context=context, section="PLAN")
+    return result or "Not specified"
+
+def stream_plan(document_text, context=None):
+    # Same as extract_plan but yields the text as it is generated, so it can be rendered while the model writes
+    return get_structured_response(document_text, PLAN_PROMPT, context=context, stream=True, section="PLAN")
+
+def extract_key_deliverables(document_text, context=None):
     system_prompt = """
     Extract the key deliverables information from the input text and format it as a JSON object with the following structure:
     
@@ -166,11 +183,10 @@ def extract_key_deliverables(document_text):
     - If no key deliverables are mentioned in the text, return: { "KEY_DELIVERABLES": ["Not specified"] }
     - Use Australian English spelling and grammar.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("KEY_DELIVERABLES", result.get("KEY_DELIVERABLES", ["Not specified"]))
-    return result
+    result = get_structured_response(document_text, system_prompt, KeyDeliverables, context=context, section="KEY_DELIVERABLES")
+    return result.KEY_DELIVERABLES if result else ["Not specified"]
 
-def extract_assumptions(document_text):
+def extract_assumptions(document_text, context=None):
     system_prompt = """
     Extract the assumptions information from the input text and format it as a JSON object with the following structure:
     
@@ -190,11 +206,10 @@ def extract_assumptions(document_text):
     - Must be something the team is relying on, but does not own or control.
     - Use Australian English spelling and grammar.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("ASSUMPTIONS", result.get("ASSUMPTIONS", ["Not specified"]))
-    return result
+    result = get_structured_response(document_text, system_prompt, Assumptions, context=context, section="ASSUMPTIONS")
+    return result.ASSUMPTIONS if result else ["Not specified"]
 
-def extract_timeline(document_text):
+def extract_timeline(document_text, context=None):
     system_prompt = """
      Extract the timeline information from the input text and format it as a JSON object with the following structure:
     
@@ -202,30 +217,29 @@ def extract_timeline(document_text):
       "MILESTONES": [
         {
           "DESCRIPTION": "string",
-          "ESTIMATED_TIME": "string"
-        },
-      "TOTAL_DURATION": "string",
-      ]
+          "ESTIMATED_TIME": integer
+        }
+      ],
+      "TOTAL_DURATION": integer
     }
     
     Important extraction guidelines:
     - Extract 2–5 major milestones or tasks based directly on the input text. Each must be a distinct phase or deliverable the team is responsible for.
     - Use short milestone descriptions (max 6 words) using the project’s actual language (do not reword unless unclear).
-    - ESTIMATED_TIME must be a whole number string representing the duration in **working days**. Do not include “days” or decimals.
+    - ESTIMATED_TIME must be a whole number representing the duration in **working days**.
     - Use explicit durations if provided.
     - If durations are not provided, assign realistic defaults based on task type:
       - Simple or one-time tasks: 1–2 days
       - Design/development stages: 3-5 days
       - Testing, deployment, or reviews: 2–3 days
     - For long-term projects (multi-phase), base durations on context but keep them proportional.
-    - Return the total duration as a string — sum of all ESTIMATED_TIME values.
+    - Return the total duration as the sum of all ESTIMATED_TIME values.
     - Use Australian English spelling and grammar.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("TIMELINE", result or {"TOTAL_DURATION": "Not specified", "MILESTONES": []})
-    return result
+    result = get_structured_response(document_text, system_prompt, Timeline, context=context, section="TIMELINE")
+    return result.model_dump() if result else {"TOTAL_DURATION": "Not specified", "MILESTONES": []}
 
-def extract_budget(document_text):
+def extract_budget(document_text, context=None):
     system_prompt = """
     Extract the budget information from the input text and format it as a JSON object with the following structure:
     
@@ -245,12 +259,18 @@ def extract_budget(document_text):
     - Extract the total cost of the project if mentioned.
     - If any additional costs are explicitly mentioned, extract it with a category and cost. Time and day rate will be empty strings.
     - If no additional costs are found, return an empty array.
+    - The related project information gives the total duration in working days, only use it to keep the total cost consistent.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("BUDGET", result or {"TOTAL_COST": "Not specified", "ADDITIONAL_COST": []})
-    return result
+    # A single total written out in the input is used as is, the LLM only looks for additional costs
+    total_cost = find_total_cost(document_text)
+    schema = partial_schema(Budget, frozenset(["ADDITIONAL_COST"])) if total_cost else Budget
+    result = get_structured_response(document_text, system_prompt, schema, context=context, section="BUDGET")
+    budget = {"TOTAL_COST": "Not specified", "ADDITIONAL_COST": [], **(result.model_dump() if result else {})}
+    if total_cost:
+        budget["TOTAL_COST"] = total_cost
+    return budget
 
-def extract_delivery_team(document_text):
+def extract_delivery_team(document_text, context=None):
     system_prompt = """
     Extract the delivery team information from the input text and format it as a JSON object with the following structure:
     
@@ -270,11 +290,15 @@ def extract_delivery_team(document_text):
     - Look for full names or first names (Sam/Samuel, Sean).
     - If no team members are found, use Samuel Cunningham and Sean Oldenburger as default team members.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("DELIVERY_TEAM", result or {"TEAM_MEMBERS": ["Samuel Cunningham", "Sean Oldenburger"]})
-    return result
+    # Names written out in the input don't need an LLM call
+    found_names = find_team_members(document_text)
+    if found_names:
+        return {"TEAM_MEMBERS": [{"NAME": name} for name in found_names]}
+
+    result = get_structured_response(document_text, system_prompt, DeliveryTeam, context=context, section="DELIVERY_TEAM")
+    return result.model_dump() if result else {"TEAM_MEMBERS": [{"NAME": "Samuel Cunningham"}, {"NAME": "Sean Oldenburger"}]}
 
-def extract_past_projects(document_text):
+def extract_past_projects(document_text, context=None):
     try:
         json_path = os.path.join(os.path.dirname(__file__), "data", "pastprojects.json")
         with open(json_path, 'r') as file:
@@ -301,6 +325,5 @@ def extract_past_projects(document_text):
     - Consider similarities in project type, technology used, or client sector.
     - If no similar projects are found, return empty array.
     """
-    result = get_structured_response(document_text, system_prompt)
-    update_project_info("PAST_PROJECTS", result or {"PAST_PROJECTS": []})
-    return result
\ No newline at end of file
+    result = get_structured_response(document_text, system_prompt, PastProjects, context=context, section="PAST_PROJECTS")
+    return result.model_dump() if result else {"PAST_PROJECTS": []}
\ No newline at end of file
@@ -0,0 +1,185 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+from .projectinfo import DATA_DIR
+from .near_duplicates import minhash_signature, signature_bytes, signature_from_bytes, band_keys, estimate_similarity
+
+# Every generated proposal is kept here with its input, extracted sections, token usage,
+# timings and blob names, so repeat requests, re-renders and analytics don't need the LLM again.
+PROPOSAL_DB_PATH = os.getenv("PROPOSAL_DB_PATH", os.path.join(DATA_DIR, "proposals.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS proposals (
+    id TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL,
+    user_input TEXT NOT NULL,
+    client TEXT,
+    company_name TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    sections TEXT NOT NULL,
+    token_usage TEXT NOT NULL DEFAULT '{}',
+    timings TEXT NOT NULL DEFAULT '{}',
+    -- Blob names rather than links, a SAS link is signed each time one is handed out
+    blob_name TEXT,
+    pdf_name TEXT,
+    input_signature BLOB
+);
+-- LSH bands of each input's MinHash signature, for finding near-duplicate inputs
+CREATE TABLE IF NOT EXISTS input_bands (
+    band_key TEXT NOT NULL,
+    proposal_id TEXT NOT NULL,
+    PRIMARY KEY (band_key, proposal_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_input_bands_proposal_id ON input_bands (proposal_id);
+CREATE INDEX IF NOT EXISTS idx_proposals_input_hash ON proposals (input_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_proposals_client ON proposals (client, created_at);
+CREATE INDEX IF NOT EXISTS idx_proposals_company_name ON proposals (company_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_proposals_created_at ON proposals (created_at);
+"""
+
+JSON_COLUMNS = ("sections", "token_usage", "timings")
+
+# sqlite3 connections can't be shared between threads, so each thread opens its own
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+def get_connection():
+    global _schema_ready
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        os.makedirs(os.path.dirname(PROPOSAL_DB_PATH), exist_ok=True)
+        connection = sqlite3.connect(PROPOSAL_DB_PATH, timeout=10)
+        connection.row_factory = sqlite3.Row
+        # WAL lets readers carry on while a proposal is being written from another thread or worker
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with _schema_lock:
+            if not _schema_ready:
+                connection.executescript(SCHEMA)
+                _schema_ready = True
+        _local.connection = connection
+    return connection
+
+def input_hash(user_input):
+    # Whitespace differences between otherwise identical inputs give the same hash
+    normalised = " ".join(user_input.split())
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+def _row_to_dict(row):
+    if row is None:
+        return None
+    proposal = dict(row)
+    for column in JSON_COLUMNS:
+        proposal[column] = json.loads(proposal[column])
+    proposal.pop("input_signature", None)
+    return proposal
+
+def save_proposal(proposal_id, user_input, project_data, token_usage=None, timings=None, blob_name=None, pdf_name=None):
+    # Insert a proposal, or replace the input and sections of an existing one keeping its created_at
+    now = datetime.now(timezone.utc).isoformat()
+    basic_info = project_data.get("BASIC_INFO", {})
+    signature = minhash_signature(" ".join(user_input.split()))
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            """
+            INSERT INTO proposals (id, input_hash, user_input, client, company_name, created_at, updated_at,
+                                   sections, token_usage, timings, blob_name, pdf_name, input_signature)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                input_hash = excluded.input_hash,
+                user_input = excluded.user_input,
+                client = excluded.client,
+                company_name = excluded.company_name,
+                updated_at = excluded.updated_at,
+                sections = excluded.sections,
+                token_usage = excluded.token_usage,
+                timings = excluded.timings,
+                blob_name = excluded.blob_name,
+                pdf_name = excluded.pdf_name,
+                input_signature = excluded.input_signature
+            """,
+            (
+                proposal_id,
+                input_hash(user_input),
+                user_input,
+                basic_info.get("CLIENT"),
+                basic_info.get("COMPANY NAME"),
+                now,
+                now,
+                json.dumps(project_data),
+                json.dumps(token_usage or {}),
+                json.dumps(timings or {}),
+                blob_name,
+                pdf_name,
+                signature_bytes(signature)
+            )
+        )
+        # The input may have changed, e.g. with notes added on regeneration
+        connection.execute("DELETE FROM input_bands WHERE proposal_id = ?", (proposal_id,))
+        connection.executemany(
+            "INSERT INTO input_bands (band_key, proposal_id) VALUES (?, ?)",
+            [(band_key, proposal_id) for band_key in band_keys(signature)]
+        )
+
+def set_blob_name(proposal_id, blob_name):
+    connection = get_connection()
+    with connection:
+        connection.execute(
+            "UPDATE proposals SET blob_name = ?, updated_at = ? WHERE id = ?",
+            (blob_name, datetime.now(timezone.utc).isoformat(), proposal_id)
+        )
+
+def get_proposal(proposal_id):
+    # Returns None if the proposal doesn't exist
+    row = get_connection().execute("SELECT * FROM proposals WHERE id = ?", (proposal_id,)).fetchone()
+    return _row_to_dict(row)
+
+def find_proposal_by_input(user_input, max_age_seconds=None):
+    # Most recent proposal generated from the same input, optionally no older than max_age_seconds
+    query = "SELECT * FROM proposals WHERE input_hash = ?"
+    params = [input_hash(user_input)]
+    if max_age_seconds is not None:
+        cutoff = datetime.now(timezone.utc).timestamp() - max_age_seconds
+        query += " AND created_at >= ?"
+        params.append(datetime.fromtimestamp(cutoff, timezone.utc).isoformat())
+    query += " ORDER BY created_at DESC LIMIT 1"
+    return _row_to_dict(get_connection().execute(query, params).fetchone())
+
+def find_near_duplicate(user_input, threshold=0.7, max_age_seconds=None):
+    """
+    Most similar earlier proposal input, found through the LSH bands rather than a full scan.
+
+    :param user_input: New input
+    :param threshold: Lowest estimated Jaccard similarity of the word shingles to accept
+    :param max_age_seconds: Only consider proposals created within this window
+    :return: Proposal dict with an added "similarity", or None if nothing is similar enough
+    """
+    signature = minhash_signature(" ".join(user_input.split()))
+    keys = band_keys(signature)
+    query = f"""
+        SELECT proposals.* FROM proposals
+        JOIN (SELECT proposal_id FROM input_bands WHERE band_key IN ({", ".join("?" * len(keys))}) GROUP BY proposal_id) AS candidates
+        ON candidates.proposal_id = proposals.id
+    """
+    params = list(keys)
+    if max_age_seconds is not None:
+        cutoff = datetime.now(timezone.utc).timestamp() - max_age_seconds
+        query += " WHERE created_at >= ?"
+        params.append(datetime.fromtimestamp(cutoff, timezone.utc).isoformat())
+    # Oldest first, so the newest of equally similar inputs wins
+    query += " ORDER BY created_at"
+
+    best, best_similarity = None, threshold
+    for row in get_connection().execute(query, params).fetchall():
+        similarity = estimate_similarity(signature, signature_from_bytes(row["input_signature"]))
+        if similarity >= best_similarity:
+            best, best_similarity = row, similarity
+    if best is None:
+        return None
+    return {**_row_to_dict(best), "similarity": best_similarity}
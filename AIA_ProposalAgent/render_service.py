@@ -0,0 +1,103 @@
+import io
+import os
+import cProfile
+import tracemalloc
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+from docx.oxml import parse_xml
+
+# Building a document with python-docx/lxml is CPU-bound and holds the GIL, so proposals rendered
+# in server threads run one at a time and stall the event loop. Rendering happens in a pool of
+# worker processes instead. Workers take plain project data and return finished .docx bytes.
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", os.cpu_count() or 2))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def warm_worker():
+    # Runs once in each worker: import python-docx, read the images into the cache and build one
+    # throwaway document, so the first real proposal a worker renders is as fast as the rest
+    from .main import create_word_doc
+    from .docx_func import IMAGES_DIR, load_image
+    for name in os.listdir(IMAGES_DIR):
+        load_image(os.path.join(IMAGES_DIR, name))
+    create_word_doc(filename=io.BytesIO(), project_data={})
+
+def profile_render(profile_path, render):
+    # cProfile of the whole render, written to <profile_path>.pstats, and a tracemalloc snapshot of
+    # the allocations still held when create_word_doc returns. The snapshot is written in full to
+    # <profile_path>.tracemalloc with its largest lines in <profile_path>-memory.txt.
+    profiler = cProfile.Profile()
+    tracemalloc.start(25)
+    profiler.enable()
+    try:
+        data, snapshot = render()
+    finally:
+        profiler.disable()
+        tracemalloc.stop()
+    profiler.dump_stats(f"{profile_path}.pstats")
+    snapshot.dump(f"{profile_path}.tracemalloc")
+    with open(f"{profile_path}-memory.txt", "w") as file:
+        for statistic in snapshot.statistics("lineno")[:50]:
+            file.write(f"{statistic}\n")
+    return data
+
+def render_document(project_data, fragments=None, profile_path=None):
+    # Executed in a worker. fragments maps sections to the XML of an already rendered body.
+    from .main import create_word_doc
+    from .docx_package import optimise_docx
+    fragments = {section: parse_xml(xml) for section, xml in (fragments or {}).items()}
+    buffer = io.BytesIO()
+
+    def render():
+        create_word_doc(filename=buffer, project_data=project_data, fragments=fragments)
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        return optimise_docx(buffer.getvalue()), snapshot
+
+    data = profile_render(profile_path, render) if profile_path else render()[0]
+    print(f"Word doc rendered in worker {os.getpid()} ({buffer.tell()} bytes, {len(data)} bytes after packaging)")
+    return data
+
+def get_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork, forking a threaded server process can copy held locks
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_worker
+            )
+        return _pool
+
+def start_render_pool():
+    # Start every worker up front. Each submit that finds no idle worker starts a new one.
+    pool = get_render_pool()
+    for future in [pool.submit(os.getpid) for _ in range(RENDER_WORKERS)]:
+        future.result()
+
+def shutdown_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+def render_docx(project_data, fragments=None, profile_path=None):
+    """
+    Render a proposal in the worker pool and return the packaged .docx bytes.
+    Blocks the calling thread, but not other threads, until the document is ready.
+
+    :param project_data: Extracted sections, as stored in the proposal store
+    :param fragments: Streamed sections already rendered by render_text_fragment
+    :param profile_path: Path prefix for a profile and memory snapshot of the render, if wanted
+    :return: .docx bytes
+    """
+    # Rendered fragments are lxml trees, they cross the process boundary as XML
+    fragments = {
+        section: etree.tostring(fragment.element.body)
+        for section, fragment in (fragments or {}).items()
+    }
+    return get_render_pool().submit(render_document, project_data, fragments, profile_path).result()
@@ -0,0 +1,103 @@
+from functools import cache
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+# One model per extracted section, sent to the model as a strict JSON schema.
+# Strict mode needs every field required and no extra keys, so fields have no defaults.
+
+class StrictModel(BaseModel):
+    model_config = ConfigDict(extra="forbid", populate_by_name=True)
+
+class BasicInfo(StrictModel):
+    project_title: str = Field(alias="PROJECT TITLE")
+    company_name: str = Field(alias="COMPANY NAME")
+    client: str = Field(alias="CLIENT")
+    project_manager: str = Field(alias="PROJECT MANAGER")
+    author: str = Field(alias="AUTHOR")
+    start_date: str = Field(alias="START DATE")
+    end_date: str = Field(alias="END DATE")
+    project_description: str = Field(alias="PROJECT DESCRIPTION")
+
+class Scope(StrictModel):
+    SCOPE: str
+
+class ContractStructure(StrictModel):
+    CONTRACT_STRUCTURE: str
+
+class KeyDeliverables(StrictModel):
+    KEY_DELIVERABLES: list[str]
+
+class Assumptions(StrictModel):
+    ASSUMPTIONS: list[str]
+
+class Milestone(StrictModel):
+    DESCRIPTION: str
+    ESTIMATED_TIME: int
+
+class Timeline(StrictModel):
+    MILESTONES: list[Milestone]
+    TOTAL_DURATION: int
+
+class AdditionalCost(StrictModel):
+    CATEGORY: str
+    TIME: str
+    DAY_RATE: str
+    COST: str
+
+class Budget(StrictModel):
+    TOTAL_COST: str
+    ADDITIONAL_COST: list[AdditionalCost]
+
+class TeamMember(StrictModel):
+    NAME: str
+
+class DeliveryTeam(StrictModel):
+    TEAM_MEMBERS: list[TeamMember]
+
+class PastProject(StrictModel):
+    PROJECT_NAME: str
+
+class PastProjects(StrictModel):
+    PAST_PROJECTS: list[PastProject]
+
+@cache
+def partial_schema(schema, fields):
+    # Strict schema with only some of another schema's fields, used when the rest were found locally.
+    # fields is a frozenset of field names as they appear in the JSON (aliases where set).
+    return create_model(
+        f"{schema.__name__}Partial",
+        __base__=StrictModel,
+        **{
+            name: (info.annotation, Field(alias=info.alias))
+            for name, info in schema.model_fields.items()
+            if (info.alias or name) in fields
+        }
+    )
+
+# Form each section takes in project_data, used to check section values given by a caller
+SECTION_SCHEMAS = {
+    "BASIC_INFO": BasicInfo,
+    "PLAN": str,
+    "SCOPE": str,
+    "CONTRACT_STRUCTURE": str,
+    "KEY_DELIVERABLES": list[str],
+    "ASSUMPTIONS": list[str],
+    "TIMELINE": Timeline,
+    "BUDGET": Budget,
+    "DELIVERY_TEAM": DeliveryTeam,
+    "PAST_PROJECTS": PastProjects,
+}
+
+@cache
+def section_values_schema(sections):
+    # Model with one required field per section, so validation errors are located by section name.
+    # sections is a frozenset of keys of SECTION_SCHEMAS.
+    return create_model(
+        "SectionValues",
+        __base__=StrictModel,
+        **{section: (SECTION_SCHEMAS[section], ...) for section in sections}
+    )
+
+def validate_section_values(values):
+    # Validated copies of the given sections as they are stored in project_data, raises pydantic.ValidationError
+    schema = section_values_schema(frozenset(values))
+    return schema.model_validate(values).model_dump(by_alias=True)
@@ -0,0 +1,95 @@
+import os
+import codecs
+import zipfile
+from lxml import etree
+
+# Text of source documents (meeting transcripts, RFPs) read from a binary stream as it arrives,
+# one chunk, paragraph or page at a time. Only the extracted text is kept, never the whole file.
+#   txt   decoded incrementally as UTF-8
+#   docx  word/document.xml parsed with iterparse straight out of the zip, paragraph by paragraph
+#   pdf   page by page with pypdf, which reads the objects of each page as it is extracted
+
+TEXT_CHUNK_SIZE = 64 * 1024
+# Text past this many characters is dropped and the rest of the source isn't read
+SOURCE_MAX_CHARS = int(os.getenv("SOURCE_MAX_CHARS", 200000))
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+SOURCE_TYPES = {
+    ".txt": "txt",
+    ".md": "txt",
+    ".vtt": "txt",
+    ".docx": "docx",
+    ".pdf": "pdf",
+}
+CONTENT_TYPES = {
+    "text/plain": "txt",
+    "text/markdown": "txt",
+    "text/vtt": "txt",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "application/pdf": "pdf",
+}
+
+def get_source_type(name, content_type=None):
+    # From the file extension, or the content type when the extension isn't known
+    source_type = SOURCE_TYPES.get(os.path.splitext(name)[1].lower())
+    if source_type is None and content_type:
+        source_type = CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+    return source_type
+
+def iter_txt(stream):
+    # utf-8-sig drops a byte order mark, bytes that aren't UTF-8 are replaced rather than failing
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    while True:
+        chunk = stream.read(TEXT_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+def iter_docx(stream):
+    with zipfile.ZipFile(stream) as archive, archive.open("word/document.xml") as document:
+        for _, paragraph in etree.iterparse(document, events=("end",), tag=f"{W}p"):
+            parts = []
+            for node in paragraph.iter(f"{W}t", f"{W}tab", f"{W}br", f"{W}cr"):
+                if node.tag == f"{W}t":
+                    parts.append(node.text or "")
+                else:
+                    parts.append("\t" if node.tag == f"{W}tab" else "\n")
+            yield "".join(parts) + "\n"
+            # Free the paragraph and anything before it, so memory stays flat on long documents
+            paragraph.clear()
+            parent = paragraph.getparent()
+            while parent is not None and paragraph.getprevious() is not None:
+                del parent[0]
+
+def iter_pdf(stream):
+    from pypdf import PdfReader
+    for page in PdfReader(stream).pages:
+        yield (page.extract_text() or "") + "\n"
+
+TEXT_EXTRACTORS = {
+    "txt": iter_txt,
+    "docx": iter_docx,
+    "pdf": iter_pdf,
+}
+
+def extract_source_text(stream, source_type, max_chars=SOURCE_MAX_CHARS):
+    """
+    Extract the text of a source document from a binary stream, reading no further than needed.
+
+    :param stream: Readable binary stream, seekable for docx and pdf
+    :param source_type: "txt", "docx" or "pdf", see get_source_type
+    :param max_chars: Most characters to return, the rest of the document is not read
+    :return: Extracted text
+    """
+    if source_type not in TEXT_EXTRACTORS:
+        raise ValueError(f"Unsupported source type: {source_type}. Supported types are {', '.join(TEXT_EXTRACTORS)}")
+    parts, length = [], 0
+    for text in TEXT_EXTRACTORS[source_type](stream):
+        parts.append(text)
+        length += len(text)
+        if max_chars and length >= max_chars:
+            print(f"Source text truncated to {max_chars} characters")
+            break
+    return "".join(parts)[:max_chars or None].strip()
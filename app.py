@@ -1,21 +1,42 @@
 from typing import Any
 import os
-import datetime
-from fastapi import FastAPI
+import asyncio
+import base64
+import contextlib
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Header, Depends, Query
+from pydantic import BaseModel, ValidationError
 from fastmcp import FastMCP
 from mcp.server.fastmcp import FastMCP
 from mcp.server.sse import SseServerTransport
+from mcp.types import TextContent, EmbeddedResource, BlobResourceContents
 from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, FileResponse
 from starlette.routing import Mount, Route
 import uvicorn
 from AIA_ProposalAgent.prompt_func import *
-from AIA_ProposalAgent.projectinfo import load_project_info, clear_project_info
-from AIA_ProposalAgent.main import extract_project_info, create_word_doc
-from blob import upload_blob, download_blob
+from AIA_ProposalAgent.proposal_store import save_proposal, set_blob_name, get_proposal, find_proposal_by_input, find_near_duplicate, input_hash
+from AIA_ProposalAgent.ai_service import track_usage
+from AIA_ProposalAgent.hedging import get_hedge_metrics
+from AIA_ProposalAgent.main import extract_project_info, regenerate_project_info, extract_revised_project_info
+from AIA_ProposalAgent.render_service import render_docx, start_render_pool, shutdown_render_pool
+from AIA_ProposalAgent.source_text import get_source_type, extract_source_text
+from blob import upload_blob_data, open_blob, get_blob_sas_url, DOCX_CONTENT_TYPE
+from proposal_blobs import proposal_blob, search_proposal_documents
+from singleflight import SingleFlight
+from pdf_converter import convert_to_pdf, converter_pool
+from session_router import SessionRouter
+from profiling import ProfileMiddleware, PROFILE_MODES, profile_request, render_profile_path, is_admin, list_profiles, get_profile_path
 
 # FastAPI app for REST endpoints
 app = FastAPI(title="Proposal MCP Agent")
 
+# Admins can profile any request with the X-Profile and X-Admin-Token headers
+app.add_middleware(ProfileMiddleware)
+
 @app.get("/")
 async def root():
     return {"message": "Proposal Agent Server Started"}
@@ -24,61 +45,431 @@ async def root():
 async def health():
     return {"status": "ok"}
 
-# Initialize FastMCP server
-mcp = FastMCP("Proposal Agent")
+# Start LibreOffice with the server instead of on the first PDF request
+PDF_WARM_START = os.environ.get("PDF_WARM_START", "false").lower() == "true"
 
-@mcp.tool()
-def get_generated_proposal(user_input: str) -> str:
-    doc_path = None
+@app.on_event("startup")
+async def warm_pdf_converters():
+    if PDF_WARM_START:
+        asyncio.get_running_loop().run_in_executor(None, converter_pool.start)
+
+@app.on_event("startup")
+async def warm_render_workers():
+    # Workers import python-docx and load the images in the background while the server starts
+    asyncio.get_running_loop().run_in_executor(None, start_render_pool)
+
+@app.on_event("shutdown")
+async def stop_render_workers():
+    shutdown_render_pool()
+
+# Initialize FastMCP server. Requests on the streamable HTTP transport are stateless, a tool call is
+# a single POST answered on the same response and holds no connection once answered.
+mcp = FastMCP("Proposal Agent", stateless_http=True)
+
+# PDF jobs queue here, one thread per converter so a job only starts once a converter is free
+pdf_executor = ThreadPoolExecutor(max_workers=len(converter_pool.converters), thread_name_prefix="pdf")
+
+# Uploads return the blob name, or an empty string if they failed. Names are what the store keeps,
+# links are signed with blob_link only when they're handed out, so none outlives its SAS.
+
+def convert_and_upload_pdf(data, proposal_id, project_data):
+    pdf_data = convert_to_pdf(data)
+    if pdf_data is None:
+        return ""
+    blob_name, metadata, tags = proposal_blob(proposal_id, project_data, "pdf")
+    uploaded = upload_blob_data(
+        pdf_data, blob_name, content_type="application/pdf", download_name="project_proposal.pdf",
+        metadata=metadata, tags=tags
+    )
+    return blob_name if uploaded else ""
+
+def upload_docx(data, proposal_id, project_data):
+    blob_name, metadata, tags = proposal_blob(proposal_id, project_data, "docx")
+    uploaded = upload_blob_data(data, blob_name, download_name="project_proposal.docx", metadata=metadata, tags=tags)
+    return blob_name if uploaded else ""
+
+def blob_link(blob_name):
+    # A SAS link valid for the full BLOB_SAS_EXPIRY_HOURS from now, None and "" are passed through
+    return get_blob_sas_url(blob_name) if blob_name else blob_name
+
+# Documents up to this size can be returned inside the tool result instead of as a link, 0 turns it off
+INLINE_MAX_BYTES = int(os.environ.get("INLINE_MAX_BYTES", 512 * 1024))
+
+# Uploads of documents already delivered inline, which only archive them
+archive_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="archive")
+
+def archive_document(proposal_id, project_data, data):
+    blob_name = upload_docx(data, proposal_id, project_data)
+    if blob_name:
+        set_blob_name(proposal_id, blob_name)
+        print(f"Proposal {proposal_id} archived")
+
+def render_and_upload(proposal_id, project_data, fragments=None, pdf=False, inline=False):
+    # Render the project data to a Word doc in memory and upload it, returning the blob names and the
+    # document if it is to be delivered inline. With pdf the PDF is converted and uploaded while the
+    # .docx uploads. pdf_name is None when no PDF was asked for, and empty if the conversion or its
+    # upload failed. With inline a document of up to INLINE_MAX_BYTES isn't uploaded here, blob_name is
+    # None and the caller archives it with archive_document once the proposal is saved.
+    
+    # Rendered in a worker process so concurrent renders use separate cores
+    data = render_docx(project_data, fragments, profile_path=render_profile_path())
+    print(f"Word doc created for proposal {proposal_id} ({len(data)} bytes)")
+    
+    pdf_upload = pdf_executor.submit(convert_and_upload_pdf, data, proposal_id, project_data) if pdf else None
+    
+    if inline and len(data) <= INLINE_MAX_BYTES:
+        return None, pdf_upload.result() if pdf_upload else None, data
+    
+    # Upload to blob storage under the proposal's date, client and ID, see proposal_blobs
+    blob_name = upload_docx(data, proposal_id, project_data)
+    return blob_name, pdf_upload.result() if pdf_upload else None, None
+
+def proposal_message(proposal_id, blob_name, pdf_name=None, attached=False):
+    if attached:
+        message = f"Proposal generated successfully! Proposal ID: {proposal_id}. The document is attached and is being archived to blob storage."
+    elif blob_name:
+        message = f"Proposal generated successfully! Proposal ID: {proposal_id}. Download here: {blob_link(blob_name)}"
+    else:
+        message = f"Proposal {proposal_id} created but Azure upload failed. Check logs above."
+    if pdf_name:
+        message += f" PDF: {blob_link(pdf_name)}"
+    elif pdf_name == "":
+        message += " PDF conversion failed. Check logs above."
+    return message
+
+def tool_result(message, proposal_id, data=None):
+    # The message alone, or with the document embedded as a binary resource when delivered inline
+    if data is None:
+        return message
+    document = BlobResourceContents(
+        uri=f"proposal://{proposal_id}/project_proposal.docx",
+        mimeType=DOCX_CONTENT_TYPE,
+        blob=base64.b64encode(data).decode("ascii")
+    )
+    return [TextContent(type="text", text=message), EmbeddedResource(type="resource", resource=document)]
+
+# Proposals generated from the same input within this window are returned from the store
+STORE_REUSE_SECONDS = int(os.environ.get("PROPOSAL_STORE_REUSE_SECONDS", 7 * 24 * 3600))
+# Inputs at least this similar to a stored one only re-run the sections their changes touch, 0 turns it off
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0.7))
+
+def generate_proposal(cleaned_input, pdf=False, inline=False):
+    # Run the full pipeline, returning the new proposal ID, its blob name, its PDF's name and the document
+    # when it is delivered inline. Proposals already in blob storage are always returned as links.
+    stored = find_proposal_by_input(cleaned_input, max_age_seconds=STORE_REUSE_SECONDS)
+    if stored and stored["blob_name"]:
+        print(f"Reusing stored proposal {stored['id']} for identical input")
+        if not pdf:
+            return stored["id"], stored["blob_name"], None, None
+        if stored["pdf_name"]:
+            return stored["id"], stored["blob_name"], stored["pdf_name"], None
+        
+        # Sections are already known, only the documents need rendering again
+        blob_name, pdf_name, _ = render_and_upload(stored["id"], stored["sections"], pdf=True)
+        save_proposal(
+            stored["id"], cleaned_input, stored["sections"], stored["token_usage"], stored["timings"],
+            blob_name or stored["blob_name"], pdf_name
+        )
+        return stored["id"], blob_name or stored["blob_name"], pdf_name, None
+    
+    similar = None
+    if NEAR_DUPLICATE_THRESHOLD:
+        similar = find_near_duplicate(cleaned_input, NEAR_DUPLICATE_THRESHOLD, max_age_seconds=STORE_REUSE_SECONDS)
+    
+    # The plan is rendered while it streams, overlapping with the other sections
+    fragments = {}
+    timings = {}
+    with track_usage() as token_usage:
+        started = time.perf_counter()
+        if similar:
+            sections, project_data = extract_revised_project_info(
+                cleaned_input, similar["user_input"], similar["sections"], fragments=fragments, timings=timings
+            )
+            print(f"Input is {similar['similarity']:.0%} similar to proposal {similar['id']}, re-running {', '.join(sections) or 'no sections'}")
+        else:
+            project_data = extract_project_info(cleaned_input, fragments=fragments, timings=timings)
+        timings["EXTRACTION"] = round(time.perf_counter() - started, 3)
+    
+    # Keep the extracted sections so later edits only re-run what changed
+    proposal_id = uuid.uuid4().hex
+    save_proposal(proposal_id, cleaned_input, project_data, token_usage, timings)
+    
+    started = time.perf_counter()
+    blob_name, pdf_name, data = render_and_upload(proposal_id, project_data, fragments, pdf, inline)
+    timings["RENDER_UPLOAD"] = round(time.perf_counter() - started, 3)
+    save_proposal(proposal_id, cleaned_input, project_data, token_usage, timings, blob_name, pdf_name)
+    if data is not None:
+        # Only submitted now the proposal is saved, so the archived name isn't overwritten
+        archive_executor.submit(archive_document, proposal_id, project_data, data)
+    
+    return proposal_id, blob_name, pdf_name, data
+
+# Retries of the same input attach to the run in progress, only successful uploads or inline documents are reused
+proposal_flight = SingleFlight(
+    ttl_seconds=int(os.environ.get("PROPOSAL_CACHE_TTL", 300)),
+    cacheable=lambda result: (bool(result[1]) or result[3] is not None) and result[2] != ""
+)
+
+# Unstructured output, the result is either text or text with the document embedded
+@mcp.tool(structured_output=False)
+async def get_generated_proposal(
+    user_input: str, pdf: bool = False, inline: bool = False, profile: str = "", admin_token: str = ""
+) -> str | list[TextContent | EmbeddedResource]:
+    """
+    Generate a proposal document from a project description and return a download link.
+    
+    :param user_input: Project description, notes or transcript to build the proposal from
+    :param pdf: Also return a PDF version of the proposal
+    :param inline: Return the .docx inside the result as an embedded resource instead of a link, if it is small enough
+    :param profile: Admin only. "cprofile" or "sample" to profile this request, leave empty otherwise. Other requests running on the same worker at the time are included in the profile
+    :param admin_token: Admin only. Token required to profile
+    """
     try:
         # Clean the input
         cleaned_input = user_input.strip()
         
+        if cleaned_input and profile:
+            if not is_admin(admin_token):
+                return "Profiling requires a valid admin token."
+            if profile not in PROFILE_MODES:
+                return f"Unknown profile mode: {profile}. Valid modes are {', '.join(PROFILE_MODES)}"
+            # Run on its own rather than attached to an identical run, so the profile covers it
+            with profile_request(profile, "get_generated_proposal") as profile_id:
+                proposal_id, blob_name, pdf_name, data = await asyncio.to_thread(generate_proposal, cleaned_input, pdf, inline)
+            message = proposal_message(proposal_id, blob_name, pdf_name, attached=data is not None)
+            if profile_id is None:
+                return tool_result(f"{message} Not profiled, another profile is being recorded.", proposal_id, data)
+            return tool_result(f"{message} Profile: {profile_id}", proposal_id, data)
+        
         if cleaned_input:  
-            clear_project_info()
-            extract_project_info(cleaned_input)
-            load_project_info()
-            
-            # Use timestamp to make unique filename
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            doc_path = f"project_proposal_{timestamp}.docx"
-            blob_name = f"proposal_{timestamp}.docx"
-            
-            create_word_doc(filename=doc_path)
-            
-            # Check if file was created
-            if not os.path.exists(doc_path):
-                return f"Word document was not created at {doc_path}"
-            
-            file_size = os.path.getsize(doc_path)
-            print(f"Word doc created: {doc_path} ({file_size} bytes)")
-            
-            # Upload to blob storage with unique name
-            blob_url = upload_blob(doc_path, blob_name)
-            
-            if blob_url:
-                return f"Proposal generated successfully! Download here: {blob_url}"
-            else:
-                return "Proposal created but Azure upload failed. Check logs above."
+            proposal_id, blob_name, pdf_name, data = await proposal_flight.run(
+                (input_hash(cleaned_input), pdf, inline), generate_proposal, cleaned_input, pdf, inline
+            )
+            return tool_result(proposal_message(proposal_id, blob_name, pdf_name, attached=data is not None), proposal_id, data)
                 
         return "No input provided."
         
     except Exception as e:
         return f"Error generating proposal: {type(e).__name__}: {str(e)}"
-    finally:
-        # Clean up the local file after upload
-        if doc_path and os.path.exists(doc_path):
-            try:
-                os.remove(doc_path)
-                print(f"Cleaned up local file: {doc_path}")
-            except Exception as cleanup_error:
-                print(f"Failed to cleanup {doc_path}: {cleanup_error}")
-
-def create_sse_server(mcp: FastMCP):
-    transport = SseServerTransport("/messages/")
+
+def read_source_blob(blob_name):
+    # Text of a source document in the proposals container, read in ranged chunks without a temp file
+    opened = open_blob(blob_name)
+    if opened is None:
+        raise KeyError(f"Source document not found: {blob_name}")
+    stream, content_type = opened
+    source_type = get_source_type(blob_name, content_type)
+    if source_type is None:
+        raise ValueError(f"Unsupported source document: {blob_name}. Use a .txt, .docx or .pdf file")
+    started = time.perf_counter()
+    with stream:
+        text = extract_source_text(stream, source_type)
+        reader = stream.raw
+        print(
+            f"Read {len(text)} characters from {blob_name} in {time.perf_counter() - started:.2f}s "
+            f"({reader.bytes_read} of {reader.size} bytes in {reader.requests} requests)"
+        )
+    return text
+
+@mcp.tool(structured_output=False)
+async def get_generated_proposal_from_blob(
+    blob_name: str, pdf: bool = False, inline: bool = False
+) -> str | list[TextContent | EmbeddedResource]:
+    """
+    Generate a proposal from a source document already in blob storage, such as a meeting transcript or an RFP, and return a download link.
+    
+    :param blob_name: Name of a .txt, .docx or .pdf blob in the proposals container
+    :param pdf: Also return a PDF version of the proposal
+    :param inline: Return the .docx inside the result as an embedded resource instead of a link, if it is small enough
+    """
+    try:
+        text = await asyncio.to_thread(read_source_blob, blob_name.strip())
+        if not text:
+            return f"No text found in {blob_name}."
+        proposal_id, blob_name, pdf_name, data = await proposal_flight.run(
+            (input_hash(text), pdf, inline), generate_proposal, text, pdf, inline
+        )
+        return tool_result(proposal_message(proposal_id, blob_name, pdf_name, attached=data is not None), proposal_id, data)
+    except (KeyError, ValueError) as e:
+        return str(e.args[0])
+    except Exception as e:
+        return f"Error generating proposal: {type(e).__name__}: {str(e)}"
+
+def regenerate_proposal(proposal_id, sections=None, notes="", values=None):
+    # Re-run the given sections of an existing proposal and re-render it, with a PDF if it had one
+    stored = get_proposal(proposal_id)
+    if stored is None:
+        raise KeyError(f"Proposal not found: {proposal_id}")
+    
+    # Sections that are re-run replace their earlier usage and timings, the rest are kept
+    timings = {}
+    with track_usage() as token_usage:
+        user_input, project_data = regenerate_project_info(
+            stored["user_input"],
+            stored["sections"],
+            sections=sections,
+            notes=notes.strip(),
+            values=values,
+            timings=timings
+        )
+    token_usage = {**stored["token_usage"], **token_usage}
+    timings = {**stored["timings"], **timings}
+    
+    started = time.perf_counter()
+    blob_name, pdf_name, _ = render_and_upload(proposal_id, project_data, pdf=bool(stored["pdf_name"]))
+    timings["RENDER_UPLOAD"] = round(time.perf_counter() - started, 3)
+    save_proposal(proposal_id, user_input, project_data, token_usage, timings, blob_name, pdf_name)
+    return blob_name, pdf_name
+
+@mcp.tool()
+async def regenerate_proposal_sections(proposal_id: str, sections: list[str] | None = None, notes: str = "") -> str:
+    """
+    Re-run only some sections of a previously generated proposal and return a new download link.
     
+    :param proposal_id: ID returned by get_generated_proposal
+    :param sections: Sections to regenerate, e.g. ["BUDGET", "DELIVERY_TEAM"]. Sections that depend on them are regenerated too. Valid sections are BASIC_INFO, PLAN, SCOPE, CONTRACT_STRUCTURE, KEY_DELIVERABLES, ASSUMPTIONS, TIMELINE, BUDGET, DELIVERY_TEAM and PAST_PROJECTS
+    :param notes: Extra notes describing what changed, added to the original input. Without sections, the sections the notes affect are picked automatically
+    """
+    try:
+        if not sections and not notes.strip():
+            return "No sections or notes provided."
+        return proposal_message(proposal_id, *await asyncio.to_thread(regenerate_proposal, proposal_id, sections, notes))
+    except Exception as e:
+        return f"Error regenerating proposal: {type(e).__name__}: {str(e)}"
+
+@mcp.tool()
+async def search_proposals(
+    client: str = "", date: str = "", proposal_id: str = "", page_size: int = 20, continuation_token: str = ""
+) -> str:
+    """
+    Find generated proposal documents by client, date or proposal ID and return their download links, one page at a time.
+    
+    :param client: Client or company name the proposal was written for
+    :param date: Day, month or year the document was generated, as YYYY-MM-DD, YYYY-MM or YYYY
+    :param proposal_id: ID returned by get_generated_proposal, for every version of that proposal
+    :param page_size: Most documents to return, up to 100
+    :param continuation_token: Token from the previous page, to get the next one
+    """
+    try:
+        # Listing, tag queries and SAS URLs all call the storage SDK, which blocks
+        page = await asyncio.to_thread(
+            search_proposal_documents,
+            client.strip() or None, date.strip() or None, proposal_id.strip() or None,
+            min(max(page_size, 1), 100), continuation_token or None
+        )
+    except ValueError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error searching proposals: {type(e).__name__}: {str(e)}"
+    if not page["documents"]:
+        return "No proposals found."
+    lines = [f"{document['name']}: {document['url']}" for document in page["documents"]]
+    if page["continuation_token"]:
+        lines.append(f"More results, continuation_token: {page['continuation_token']}")
+    return "\n".join(lines)
+
+class RegenerateRequest(BaseModel):
+    sections: list[str] = []
+    notes: str = ""
+    values: dict[str, Any] = {}
+
+@app.post("/proposals/{proposal_id}/regenerate")
+async def regenerate(proposal_id: str, request: RegenerateRequest):
+    # Same as the MCP tool, but also accepts replacement section values that skip the LLM entirely
+    if not request.sections and not request.values and not request.notes.strip():
+        raise HTTPException(status_code=400, detail="No sections, values or notes provided")
+    try:
+        blob_name, pdf_name = await run_in_threadpool(
+            regenerate_proposal, proposal_id, request.sections, request.notes, request.values
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValidationError as e:
+        # Replacement values that don't match their section's schema
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not blob_name:
+        raise HTTPException(status_code=502, detail="Proposal created but Azure upload failed")
+    return {"proposal_id": proposal_id, "blob_url": blob_link(blob_name), "pdf_url": blob_link(pdf_name)}
+
+@app.get("/proposals")
+async def search_stored_proposals(
+    client: str | None = None, date: str | None = None, proposal_id: str | None = None,
+    page_size: int = Query(default=20, ge=1, le=100), continuation_token: str | None = None
+):
+    # One page of proposal documents, pass continuation_token from the response for the next page
+    try:
+        return await run_in_threadpool(
+            search_proposal_documents, client, date, proposal_id, page_size, continuation_token
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/proposals/{proposal_id}")
+async def get_stored_proposal(proposal_id: str):
+    # Stored input, sections, token usage, timings and document links of a generated proposal
+    proposal = await run_in_threadpool(get_proposal, proposal_id)
+    if proposal is None:
+        raise HTTPException(status_code=404, detail=f"Proposal not found: {proposal_id}")
+    return {**proposal, "blob_url": blob_link(proposal["blob_name"]), "pdf_url": blob_link(proposal["pdf_name"])}
+
+@app.get("/metrics/hedging")
+async def hedging_metrics():
+    # Hedged LLM request counts and rates, and recent latency percentiles per section, for this worker
+    return get_hedge_metrics()
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def get_profiles():
+    """
+    Profiles recorded by this worker, newest first.
+
+    A profile covers the whole worker process while the request ran, not only that request. Work
+    from other requests running on the worker at the same time is included, so profile on an idle
+    worker for a clean per-request profile. Render profiles (-render.pstats) only cover the request's own render.
+    """
+    return await run_in_threadpool(list_profiles)
+
+@app.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+async def download_profile(name: str):
+    # .pstats for pstats or snakeviz, .folded for flamegraph tools, .tracemalloc for tracemalloc.Snapshot.load
+    path = get_profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {name}")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+# Any worker can take a message for any session, messages for a session owned by another worker
+# are forwarded to it
+session_router = SessionRouter(SseServerTransport("/messages/"))
+
+@app.on_event("startup")
+async def start_session_router():
+    await session_router.start()
+
+@app.on_event("shutdown")
+async def stop_session_router():
+    await session_router.stop()
+
+# The streamable HTTP session manager runs for the life of the server, it is normally started by
+# the lifespan of the app from streamable_http_app, which doesn't run once mounted
+streamable_http_app = mcp.streamable_http_app()
+streamable_http_stack = contextlib.AsyncExitStack()
+
+@app.on_event("startup")
+async def start_streamable_http():
+    await streamable_http_stack.enter_async_context(mcp.session_manager.run())
+
+@app.on_event("shutdown")
+async def stop_streamable_http():
+    await streamable_http_stack.aclose()
+
+def create_sse_server(mcp: FastMCP, session_router: SessionRouter):
     async def handle_sse(request):
-        async with transport.connect_sse(
+        async with session_router.connect_sse(
             request.scope, 
             request.receive, 
             request._send
@@ -88,15 +479,19 @@ def create_sse_server(mcp: FastMCP):
                 streams[1], 
                 mcp._mcp_server.create_initialization_options()
             )
+        # Starlette expects a response once the client disconnects
+        return Response()
     
     routes = [
         Route("/sse/", endpoint=handle_sse),
-        Mount("/messages/", app=transport.handle_post_message),
+        Mount("/messages/", app=session_router.handle_post_message),
+        # Streamable HTTP transport at /mcp, for clients that support it
+        *streamable_http_app.routes,
     ]
     
     return Starlette(routes=routes)
 
-app.mount("/", create_sse_server(mcp))
+app.mount("/", create_sse_server(mcp, session_router))
 
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 8000))
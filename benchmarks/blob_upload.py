@@ -0,0 +1,102 @@
+"""
+Compare the old single-shot blob upload with the staged block upload in blob.py.
+
+Run against Azurite:
+    azurite-blob --silent &
+    AZURE_CONNECTION_STRING="UseDevelopmentStorage=true" python benchmarks/blob_upload.py
+
+Or against the built-in fake, which accepts every request after a fixed delay plus a per-connection
+transfer time, to stand in for network latency and bandwidth:
+    python benchmarks/blob_upload.py --fake --latency-ms 40 --bandwidth-mbps 100
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AZURITE_KEY = "Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw=="
+
+class FakeBlobHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    bytes_per_second = None
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        delay = self.latency
+        if self.bytes_per_second:
+            delay += length / self.bytes_per_second
+        time.sleep(delay)
+        self.send_response(201)
+        self.send_header("ETag", '"0x8D000000000000"')
+        self.send_header("Last-Modified", formatdate(usegmt=True))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_server(latency_ms, bandwidth_mbps):
+    FakeBlobHandler.latency = latency_ms / 1000
+    FakeBlobHandler.bytes_per_second = bandwidth_mbps * 1e6 / 8 if bandwidth_mbps else None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBlobHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    return (
+        f"DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;AccountKey={AZURITE_KEY};"
+        f"BlobEndpoint=http://127.0.0.1:{port}/devstoreaccount1;"
+    )
+
+def single_shot_upload(blob, data, blob_name):
+    # What upload_blob did before: a fresh client, default settings and no content settings
+    from azure.storage.blob import BlobServiceClient
+    client = BlobServiceClient.from_connection_string(blob.AZURE_CONNECTION_STRING)
+    container_client = client.get_container_client(blob.CONTAINER_NAME)
+    try:
+        container_client.create_container()
+    except Exception:
+        pass
+    container_client.upload_blob(name=blob_name, data=data, overwrite=True)
+    return client.get_blob_client(container=blob.CONTAINER_NAME, blob=blob_name).url
+
+def measure(label, func, data, repeats):
+    timings = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        if not func(data, f"benchmark/{label}_{i}.docx"):
+            raise RuntimeError(f"{label} upload failed")
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    average = sum(timings) / len(timings)
+    print(f"  {label:<12} best {best * 1000:8.1f} ms  avg {average * 1000:8.1f} ms  {len(data) / best / 1e6:7.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fake", action="store_true", help="Use the built-in fake blob endpoint")
+    parser.add_argument("--latency-ms", type=float, default=40, help="Delay per request for the fake endpoint")
+    parser.add_argument("--bandwidth-mbps", type=float, default=100, help="Per-connection bandwidth for the fake endpoint, 0 for unlimited")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.3, 4, 16, 64])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.fake:
+        os.environ["AZURE_CONNECTION_STRING"] = start_fake_server(args.latency_ms, args.bandwidth_mbps)
+    import blob
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    logging.getLogger("blob").setLevel(logging.WARNING)
+
+    print(f"max_concurrency={blob.BLOB_MAX_CONCURRENCY} block_size={blob.BLOB_BLOCK_SIZE}")
+    for size_mb in args.sizes_mb:
+        data = os.urandom(int(size_mb * 1024 * 1024))
+        print(f"{size_mb} MB")
+        measure("single-shot", lambda d, n: single_shot_upload(blob, d, n), data, args.repeats)
+        measure("staged", lambda d, n: blob.upload_blob_data(d, n), data, args.repeats)
+
+if __name__ == "__main__":
+    main()
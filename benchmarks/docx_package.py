@@ -0,0 +1,38 @@
+"""
+Size and time of the .docx package before and after optimise_docx, per deflate level.
+
+    python benchmarks/docx_package.py
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AIA_ProposalAgent.main import create_word_doc
+from AIA_ProposalAgent.docx_package import optimise_docx
+
+# Both alias keys for the same person, so the team section adds the same headshot twice
+SAMPLE_PROJECT = {
+    "BASIC_INFO": {"PROJECT TITLE": "Document Processing Pipeline", "CLIENT": "Example Client"},
+    "SCOPE": "Automated extraction of invoice data.",
+    "KEY_DELIVERABLES": ["Extraction service", "Review dashboard"],
+    "TIMELINE": {"TOTAL_DURATION": 6, "MILESTONES": [{"DESCRIPTION": "Build", "ESTIMATED_TIME": 6}]},
+    "DELIVERY_TEAM": {"TEAM_MEMBERS": [{"NAME": "Samuel Cunningham"}, {"NAME": "Sam Cunningham"}, {"NAME": "Sean Oldenburger"}]},
+}
+
+def main():
+    buffer = io.BytesIO()
+    create_word_doc(filename=buffer, project_data=SAMPLE_PROJECT)
+    data = buffer.getvalue()
+    print(f"python-docx output: {len(data)} bytes")
+    for level in (1, 6, 9):
+        started = time.perf_counter()
+        optimised = optimise_docx(data, compresslevel=level)
+        elapsed = time.perf_counter() - started
+        saved = 1 - len(optimised) / len(data)
+        print(f"level {level}: {len(optimised)} bytes ({saved:.1%} smaller) in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
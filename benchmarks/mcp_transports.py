@@ -0,0 +1,200 @@
+"""
+Compare the SSE and streamable HTTP MCP transports: tool call latency and how many connections
+the server holds. Each client makes a number of tool calls with a pause between them, the way an
+assistant calls tools between turns. Uses the replay LLM backend, so no cloud services are needed.
+
+    python benchmarks/mcp_transports.py --clients 50 --calls 5 --think-ms 500
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROTOCOL_VERSION = "2025-06-18"
+
+# Returns without touching the LLM or blob storage, so the timings are the transport's own
+TOOL_CALL = {
+    "name": "regenerate_proposal_sections",
+    "arguments": {"proposal_id": "benchmark", "sections": []},
+}
+
+def request(request_id, method, params=None):
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params is not None:
+        message["params"] = params
+    return message
+
+def initialize(request_id):
+    return request(request_id, "initialize", {
+        "protocolVersion": PROTOCOL_VERSION,
+        "capabilities": {},
+        "clientInfo": {"name": "transport-benchmark", "version": "1"},
+    })
+
+def wait_for_server(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError("Server did not start")
+
+def count_connections(port):
+    # Established TCP connections on the server's port, from the kernel's socket tables
+    count = 0
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table, "r") as file:
+                next(file)
+                for line in file:
+                    fields = line.split()
+                    if int(fields[1].rsplit(":", 1)[1], 16) == port and fields[3] == "01":
+                        count += 1
+        except FileNotFoundError:
+            pass
+    return count
+
+class ConnectionSampler(threading.Thread):
+    def __init__(self, port, interval=0.05):
+        super().__init__(daemon=True)
+        self.port = port
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.samples.append(count_connections(self.port))
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return max(self.samples, default=0), statistics.mean(self.samples) if self.samples else 0
+
+def sse_client(base_url, calls, think, latencies):
+    # One session: the stream stays open for every call, messages are posted next to it
+    with httpx.Client(timeout=30) as client, client.stream("GET", f"{base_url}/sse/") as stream:
+        events = (json.loads(line[len("data: "):]) if line.startswith("data: {") else line[len("data: "):]
+                  for line in stream.iter_lines() if line.startswith("data: "))
+        endpoint = f"{base_url}{next(events)}"
+
+        def call(message):
+            started = time.perf_counter()
+            client.post(endpoint, json=message).raise_for_status()
+            for event in events:
+                if isinstance(event, dict) and event.get("id") == message["id"]:
+                    return event, time.perf_counter() - started
+            raise RuntimeError("Stream closed before the response")
+
+        call(initialize(0))
+        client.post(endpoint, json={"jsonrpc": "2.0", "method": "notifications/initialized"}).raise_for_status()
+        for request_id in range(1, calls + 1):
+            _, latency = call(request(request_id, "tools/call", TOOL_CALL))
+            latencies.append(latency)
+            time.sleep(think)
+
+def read_response(response):
+    # The server answers a POST with a short event stream holding the response, or with plain JSON
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data: "):
+                return json.loads(line[len("data: "):])
+        return {}
+    return response.json()
+
+def streamable_http_client(base_url, calls, think, latencies):
+    # Stateless: every call is a POST answered on its own response, with no session to set up first
+    headers = {"Accept": "application/json, text/event-stream", "MCP-Protocol-Version": PROTOCOL_VERSION}
+    with httpx.Client(timeout=30, headers=headers) as client:
+        for request_id in range(1, calls + 1):
+            started = time.perf_counter()
+            response = client.post(f"{base_url}/mcp", json=request(request_id, "tools/call", TOOL_CALL))
+            response.raise_for_status()
+            if "result" not in read_response(response):
+                raise RuntimeError(f"Tool call failed: {response.text}")
+            latencies.append(time.perf_counter() - started)
+            time.sleep(think)
+
+def run_clients(target, base_url, port, clients, calls, think):
+    latencies = []
+    errors = []
+
+    def run():
+        try:
+            target(base_url, calls, think, latencies)
+        except Exception as e:
+            errors.append(e)
+
+    sampler = ConnectionSampler(port)
+    sampler.start()
+    threads = [threading.Thread(target=run) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    peak, mean = sampler.stop()
+    return latencies, errors, elapsed, peak, mean
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=5, help="tool calls per client")
+    parser.add_argument("--think-ms", type=float, default=500, help="pause between a client's calls")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8124)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="transports_")
+    env = dict(
+        os.environ,
+        LLM_BACKEND="replay",
+        RENDER_WORKERS="1",
+        SESSION_REGISTRY_DIR=directory,
+        PROPOSAL_DB_PATH=os.path.join(directory, "proposals.db"),
+        PYTHONPATH=ROOT,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_for_server(base_url)
+        print(f"{args.clients} clients x {args.calls} tool calls, {args.think_ms:.0f} ms between calls")
+        print(f"{'transport':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak conns':>12}{'mean conns':>12}{'errors':>8}{'total s':>9}")
+        for name, target in (("sse", sse_client), ("streamable-http", streamable_http_client)):
+            latencies, errors, elapsed, peak, mean = run_clients(
+                target, base_url, args.port, args.clients, args.calls, args.think_ms / 1000
+            )
+            row = [percentile(latencies, fraction) * 1000 for fraction in (0.5, 0.95, 0.99)]
+            print(f"{name:<16}{row[0]:>9.1f}{row[1]:>9.1f}{row[2]:>9.1f}{peak:>12}{mean:>12.1f}{len(errors):>8}{elapsed:>9.2f}")
+            for error in itertools.islice(errors, 3):
+                print(f"  {type(error).__name__}: {error}")
+            # Let keep-alive connections from this run close before the next one is counted
+            time.sleep(6)
+    finally:
+        server.terminate()
+        server.wait(30)
+
+if __name__ == "__main__":
+    main()
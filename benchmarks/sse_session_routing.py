@@ -0,0 +1,121 @@
+"""
+Run the app under several uvicorn workers and check that MCP messages reach their SSE session
+whichever worker accepts the POST. Uses the replay LLM backend, so no cloud services are needed.
+Exits with status 1 if any session goes unanswered or any POST isn't accepted with 202.
+
+    python benchmarks/sse_session_routing.py --workers 4 --sessions 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "routing-check", "version": "1"}},
+}
+
+def wait_for_server(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError("Server did not start")
+
+def run_session(base_url, results, index):
+    # Keep the SSE stream open on one connection and post on fresh connections, which the
+    # kernel spreads across the workers. A session that errors is left as unanswered.
+    try:
+        open_session(base_url, results, index)
+    except httpx.HTTPError as e:
+        print(f"session {index} failed: {type(e).__name__}: {e}")
+
+def open_session(base_url, results, index):
+    started = time.perf_counter()
+    with httpx.Client(timeout=30) as sse_client, sse_client.stream("GET", f"{base_url}/sse/") as stream:
+        lines = stream.iter_lines()
+        endpoint = None
+        for line in lines:
+            if line.startswith("data: "):
+                endpoint = line[len("data: "):]
+                break
+        with httpx.Client(timeout=30, headers={"Connection": "close"}) as post_client:
+            status = post_client.post(f"{base_url}{endpoint}", json=INITIALIZE).status_code
+        if status != 202:
+            results[index] = (status, None)
+            return
+        for line in lines:
+            if line.startswith("data: ") and json.loads(line[len("data: "):]).get("id") == 1:
+                results[index] = (status, time.perf_counter() - started)
+                return
+    results[index] = (status, None)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8123)
+    args = parser.parse_args()
+
+    registry = tempfile.mkdtemp(prefix="sessions_")
+    env = dict(
+        os.environ,
+        LLM_BACKEND="replay",
+        RENDER_WORKERS="1",
+        SESSION_REGISTRY_DIR=registry,
+        PROPOSAL_DB_PATH=os.path.join(registry, "proposals.db"),
+        PYTHONPATH=ROOT,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_for_server(base_url)
+        results = [(None, None)] * args.sessions
+        threads = [threading.Thread(target=run_session, args=(base_url, results, i)) for i in range(args.sessions)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        owners = Counter(
+            open(os.path.join(registry, name)).read()
+            for name in os.listdir(registry) if name.endswith(".session")
+        )
+        answered = [latency for status, latency in results if latency is not None]
+        print(f"{len(answered)}/{args.sessions} sessions answered in {elapsed:.2f}s, POST statuses {Counter(status for status, _ in results)}")
+        print(f"sessions still open per worker socket: {dict(owners)}")
+        if answered:
+            print(f"slowest round trip {max(answered) * 1000:.0f} ms")
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    failed = [index for index, (status, latency) in enumerate(results) if status != 202 or latency is None]
+    if failed:
+        print(f"FAILED: {len(failed)} sessions unanswered or not accepted: {failed}")
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,11 @@
-from azure.storage.blob import BlobServiceClient
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobServiceClient, BlobSasPermissions, ContentSettings, generate_blob_sas
+import io
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
 # Set up logging for debugging
@@ -11,6 +16,120 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 AZURE_CONNECTION_STRING = os.getenv("AZURE_CONNECTION_STRING")
 CONTAINER_NAME = "proposals"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Uploads larger than one block are staged as blocks in parallel instead of a single put
+BLOB_MAX_CONCURRENCY = int(os.getenv("BLOB_MAX_CONCURRENCY", 4))
+BLOB_BLOCK_SIZE = int(os.getenv("BLOB_BLOCK_SIZE", 4 * 1024 * 1024))
+# How long the read-only SAS link returned after an upload stays valid
+BLOB_SAS_EXPIRY_HOURS = int(os.getenv("BLOB_SAS_EXPIRY_HOURS", 7 * 24))
+# Bytes fetched per ranged read when a blob is opened as a stream
+BLOB_READ_CHUNK_SIZE = int(os.getenv("BLOB_READ_CHUNK_SIZE", 1024 * 1024))
+
+_service_client = None
+_container_ready = False
+_client_lock = threading.Lock()
+
+def get_blob_service_client():
+    """
+    Return a shared BlobServiceClient so every upload reuses the same connection pool.
+    
+    :return: BlobServiceClient configured with the block upload settings
+    """
+    global _service_client
+    with _client_lock:
+        if _service_client is None:
+            _service_client = BlobServiceClient.from_connection_string(
+                AZURE_CONNECTION_STRING,
+                max_block_size=BLOB_BLOCK_SIZE,
+                max_single_put_size=BLOB_BLOCK_SIZE
+            )
+        return _service_client
+
+def get_container_client():
+    """
+    Return the proposals container client, creating the container on first use only.
+    
+    :return: ContainerClient for CONTAINER_NAME
+    """
+    global _container_ready
+    container_client = get_blob_service_client().get_container_client(CONTAINER_NAME)
+    if not _container_ready:
+        try:
+            container_client.create_container()
+            logger.info(f"Created container: {CONTAINER_NAME}")
+        except Exception as container_error:
+            logger.info(f"Container already exists or creation issue: {str(container_error)}")
+        _container_ready = True
+    return container_client
+
+def get_blob_sas_url(blob_name: str, expiry_hours: int = BLOB_SAS_EXPIRY_HOURS) -> str:
+    """
+    Build a read-only SAS URL for a blob. The signature is computed locally from the account key,
+    so this makes no request to Azure. Falls back to the plain URL without an account key.
+    
+    :param blob_name: Name of the blob in Azure
+    :param expiry_hours: Hours until the link expires
+    :return: Blob URL, with a SAS token when one could be generated
+    """
+    blob_service_client = get_blob_service_client()
+    blob_url = blob_service_client.get_blob_client(container=CONTAINER_NAME, blob=blob_name).url
+    account_key = getattr(blob_service_client.credential, "account_key", None)
+    if not account_key:
+        return blob_url
+    
+    sas_token = generate_blob_sas(
+        account_name=blob_service_client.account_name,
+        container_name=CONTAINER_NAME,
+        blob_name=blob_name,
+        account_key=account_key,
+        permission=BlobSasPermissions(read=True),
+        expiry=datetime.now(timezone.utc) + timedelta(hours=expiry_hours)
+    )
+    return f"{blob_url}?{sas_token}"
+
+def upload_blob_data(data, blob_name: str, content_type: str = DOCX_CONTENT_TYPE, download_name: str = None, length: int = None,
+                     metadata: dict = None, tags: dict = None) -> str:
+    """
+    Upload bytes or a stream to Azure Blob Storage with content settings, and return a SAS URL.
+    
+    :param data: Bytes or a readable stream to upload
+    :param blob_name: Name to give the blob in Azure
+    :param content_type: Content-Type served with the blob
+    :param download_name: File name for Content-Disposition, defaults to the last part of blob_name
+    :param length: Size of a stream in bytes, if known
+    :param metadata: Metadata stored with the blob, returned when listing
+    :param tags: Blob index tags, searchable across the container with find_blobs_by_tags
+    :return: Blob URL if successful, empty string if failed
+    """
+    try:
+        logger.info(f"Starting upload to blob {blob_name}")
+        
+        # Content-Type and Content-Disposition are stored on the blob so downloads skip content sniffing
+        download_name = download_name or blob_name.rsplit("/", 1)[-1]
+        content_settings = ContentSettings(
+            content_type=content_type,
+            content_disposition=f'attachment; filename="{download_name}"'
+        )
+        
+        get_container_client().upload_blob(
+            name=blob_name,
+            data=data,
+            length=length,
+            overwrite=True,
+            content_settings=content_settings,
+            metadata=metadata,
+            tags=tags,
+            max_concurrency=BLOB_MAX_CONCURRENCY
+        )
+        logger.info(f"Successfully uploaded blob: {blob_name}")
+        
+        return get_blob_sas_url(blob_name)
+        
+    except Exception as e:
+        error_msg = f"Upload failed: {type(e).__name__}: {str(e)}"
+        logger.error(error_msg)
+        return ""
 
 def upload_blob(local_file_path: str, blob_name: str) -> str:
     """
@@ -32,31 +151,9 @@ def upload_blob(local_file_path: str, blob_name: str) -> str:
         file_size = os.path.getsize(local_file_path)
         logger.info(f"File size: {file_size} bytes")
         
-        # Create blob service client
-        blob_service_client = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
-        
-        # Get container client
-        container_client = blob_service_client.get_container_client(CONTAINER_NAME)
-        
-        # Try to create container if it doesn't exist
-        try:
-            container_client.create_container()
-            logger.info(f"Created container: {CONTAINER_NAME}")
-        except Exception as container_error:
-            logger.info(f"Container already exists or creation issue: {str(container_error)}")
-        
         # Upload the blob
         with open(local_file_path, "rb") as data:
-            container_client.upload_blob(name=blob_name, data=data, overwrite=True)
-            logger.info(f"Successfully uploaded blob: {blob_name}")
-        
-        # Get the blob client to construct proper URL
-        blob_client = blob_service_client.get_blob_client(container=CONTAINER_NAME, blob=blob_name)
-        blob_url = blob_client.url
-        
-        logger.info(f"Blob URL: {blob_url}")
-        
-        return blob_url
+            return upload_blob_data(data, blob_name, length=file_size)
         
     except FileNotFoundError as e:
         error_msg = f"File not found: {str(e)}"
@@ -67,6 +164,137 @@ def upload_blob(local_file_path: str, blob_name: str) -> str:
         logger.error(error_msg)
         return ""
 
+class BlobReader(io.RawIOBase):
+    """
+    Seekable read-only file over a blob. Only the byte ranges that are read are downloaded, so
+    formats that seek, such as the zip directory at the end of a .docx, never need the whole blob.
+    
+    :param blob_client: BlobClient of the blob to read
+    :param size: Size of the blob in bytes
+    """
+
+    def __init__(self, blob_client, size):
+        self.blob_client = blob_client
+        self.size = size
+        self.position = 0
+        # Ranged requests made and bytes fetched, for logging
+        self.requests = 0
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def readinto(self, buffer):
+        length = min(len(buffer), self.size - self.position)
+        if length <= 0:
+            return 0
+        data = self.blob_client.download_blob(offset=self.position, length=length).readall()
+        buffer[:len(data)] = data
+        self.position += len(data)
+        self.requests += 1
+        self.bytes_read += len(data)
+        return len(data)
+
+def open_blob(blob_name: str, chunk_size: int = BLOB_READ_CHUNK_SIZE):
+    """
+    Open a blob as a buffered, seekable binary stream that downloads chunk_size bytes at a time.
+    
+    :param blob_name: Name of the blob in Azure
+    :param chunk_size: Bytes fetched per ranged read
+    :return: Tuple of the stream and the blob's content type, or None if the blob can't be read
+    """
+    try:
+        blob_client = get_blob_service_client().get_blob_client(container=CONTAINER_NAME, blob=blob_name)
+        properties = blob_client.get_blob_properties()
+        logger.info(f"Opened blob {blob_name} ({properties.size} bytes)")
+        raw = BlobReader(blob_client, properties.size)
+        return io.BufferedReader(raw, buffer_size=chunk_size), properties.content_settings.content_type
+    except Exception as e:
+        error_msg = f"Open failed: {type(e).__name__}: {str(e)}"
+        logger.error(error_msg)
+        return None
+
+def blob_dict(blob):
+    # Name, size, last modified time and metadata of a listed blob or of its properties
+    return {
+        "name": blob.name,
+        "size": blob.size,
+        "last_modified": blob.last_modified.isoformat() if blob.last_modified else None,
+        "metadata": blob.metadata or {}
+    }
+
+def list_blobs_page(prefix: str = None, page_size: int = 50, continuation_token: str = None):
+    """
+    One page of the blobs under a prefix, with their metadata. Only the blobs under the prefix are
+    listed by the service, so a narrow prefix stays fast however large the container gets.
+    
+    :param prefix: Blob name prefix, e.g. "2025/06/"
+    :param page_size: Most blobs to return
+    :param continuation_token: Token from the previous page, None for the first page
+    :return: Tuple of a list of blob dicts and the token for the next page, None on the last page
+    """
+    pages = get_container_client().list_blobs(
+        name_starts_with=prefix or None,
+        include=["metadata"],
+        results_per_page=page_size
+    ).by_page(continuation_token=continuation_token)
+    blobs = [blob_dict(blob) for blob in next(pages, [])]
+    return blobs, pages.continuation_token
+
+def find_blobs_by_tags(filter_expression: str, page_size: int = 50, continuation_token: str = None):
+    """
+    One page of the blobs whose index tags match a filter, found through the service's tag index.
+    
+    :param filter_expression: Tag filter, e.g. "\"client\" = 'acme' AND \"date\" >= '2025-06-01'"
+    :param page_size: Most blobs to return
+    :param continuation_token: Token from the previous page, None for the first page
+    :return: Tuple of a list of blob dicts and the token for the next page, None on the last page
+    """
+    pages = get_container_client().find_blobs_by_tags(
+        filter_expression,
+        results_per_page=page_size
+    ).by_page(continuation_token=continuation_token)
+    blobs = [{"name": blob.name, "tags": blob.tags or {}} for blob in next(pages, [])]
+    return blobs, pages.continuation_token
+
+def get_blobs_properties(blob_names: list) -> list:
+    """
+    Size, last modified time and metadata of several blobs, in the same form as list_blobs_page.
+    Each blob takes its own request, so up to BLOB_MAX_CONCURRENCY are fetched at a time.
+    
+    :param blob_names: Names of the blobs in Azure
+    :return: List of blob dicts in the same order, without any blob that no longer exists
+    """
+    container_client = get_container_client()
+    
+    def properties(blob_name):
+        try:
+            return blob_dict(container_client.get_blob_client(blob_name).get_blob_properties())
+        except ResourceNotFoundError:
+            logger.info(f"Blob {blob_name} was deleted before its properties were read")
+            return None
+    
+    if not blob_names:
+        return []
+    with ThreadPoolExecutor(max_workers=min(BLOB_MAX_CONCURRENCY, len(blob_names))) as executor:
+        return [blob for blob in executor.map(properties, blob_names) if blob is not None]
+
 def download_blob(blob_name: str, download_file_path: str) -> bool:
     """
     Download a blob from Azure Blob Storage to a local file.
@@ -78,8 +306,8 @@ def download_blob(blob_name: str, download_file_path: str) -> bool:
     try:
         logger.info(f"Starting download of blob {blob_name} to {download_file_path}")
         
-        # Create blob service client
-        blob_service_client = BlobServiceClient.from_connection_string(AZURE_CONNECTION_STRING)
+        # Reuse the shared blob service client
+        blob_service_client = get_blob_service_client()
         
         # Get blob client
         blob_client = blob_service_client.get_blob_client(container=CONTAINER_NAME, blob=blob_name)
@@ -0,0 +1,245 @@
+import os
+import queue
+import shutil
+import tempfile
+import atexit
+import socket
+import logging
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Each converter is a long-lived unoserver process wrapping its own LibreOffice instance, so a
+# conversion doesn't pay for a cold soffice start. Set UNOSERVER_ADDRESSES to host:port pairs
+# to use servers managed elsewhere instead of starting them here.
+# Every uvicorn worker starts its own pool, so managed servers get ports the OS hands out and a
+# LibreOffice profile named after the worker's pid, and workers never share an instance.
+UNOSERVER_ADDRESSES = [address.strip() for address in os.getenv("UNOSERVER_ADDRESSES", "").split(",") if address.strip()]
+UNOSERVER_COMMAND = os.getenv("UNOSERVER_COMMAND", "unoserver")
+PDF_CONVERTER_POOL_SIZE = int(os.getenv("PDF_CONVERTER_POOL_SIZE", 2))
+PDF_CONVERT_TIMEOUT = int(os.getenv("PDF_CONVERT_TIMEOUT", 120))
+# Time allowed for LibreOffice to come up when a converter is (re)started
+UNOSERVER_START_TIMEOUT = int(os.getenv("UNOSERVER_START_TIMEOUT", 60))
+
+def free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+def process_tree(pid):
+    # The process and all of its descendants, read from /proc
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as file:
+                pending.extend(int(child) for child in file.read().split())
+        except OSError:
+            pass
+    return pids
+
+def listens_on(pid, port):
+    """
+    Whether the process or one of its children has a socket listening on the port, so a server
+    answering on the port can be told apart from one another process started.
+
+    :param pid: Process to check
+    :param port: TCP port
+    :return: True or False, None where /proc isn't available to tell
+    """
+    if not os.path.isdir("/proc/net"):
+        return None
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as file:
+                next(file)
+                for line in file:
+                    fields = line.split()
+                    # State 0A is LISTEN
+                    if fields[3] == "0A" and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                        inodes.add(f"socket:[{fields[9]}]")
+        except OSError:
+            continue
+    for owner in process_tree(pid):
+        try:
+            descriptors = os.listdir(f"/proc/{owner}/fd")
+        except OSError:
+            continue
+        for descriptor in descriptors:
+            try:
+                if os.readlink(f"/proc/{owner}/fd/{descriptor}") in inodes:
+                    return True
+            except OSError:
+                continue
+    return False
+
+class Converter:
+    """
+    One unoserver instance, started by the pool or managed externally.
+
+    :param host: Interface the unoserver XML-RPC server listens on
+    :param port: XML-RPC port, picked on each start for managed servers
+    :param index: Position in the pool, used for the LibreOffice profile
+    :param managed: Whether this process starts and stops the server
+    """
+
+    def __init__(self, host, port, index, managed):
+        self.host = host
+        self.port = port
+        self.index = index
+        self.managed = managed
+        self.process = None
+        self.profile_dir = None
+
+    def start(self):
+        if not self.managed:
+            return
+        # Separate ports and user profiles, LibreOffice locks its profile to one instance. The pid is
+        # read here rather than at import, in case the pool was built before the worker forked. The
+        # profile is kept across restarts so LibreOffice doesn't build it again.
+        self.profile_dir = os.path.join(tempfile.gettempdir(), f"proposal_agent_unoserver_{os.getpid()}_{self.index}")
+        self.port = free_port(self.host)
+        self.process = subprocess.Popen(
+            [
+                UNOSERVER_COMMAND,
+                "--interface", self.host,
+                "--port", str(self.port),
+                "--uno-port", str(free_port(self.host)),
+                "--user-installation", f"file://{self.profile_dir}",
+                "--conversion-timeout", str(PDF_CONVERT_TIMEOUT),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + UNOSERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"unoserver on port {self.port} exited with code {self.process.returncode}")
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1):
+                    pass
+            except OSError:
+                time.sleep(0.5)
+                continue
+            # Only ready once the server answering is the one started here, not another worker's
+            if listens_on(self.process.pid, self.port) is not False:
+                logger.info(f"Started unoserver on port {self.port}")
+                return
+            time.sleep(0.5)
+        self.stop()
+        raise TimeoutError(f"unoserver on port {self.port} did not start within {UNOSERVER_START_TIMEOUT}s")
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def convert(self, data, convert_to):
+        # unoserver exits when a conversion times out, so a dead managed server is restarted first
+        if self.managed and (self.process is None or self.process.poll() is not None):
+            self.restart()
+        from unoserver.client import UnoClient
+        client = UnoClient(server=self.host, port=str(self.port), host_location="remote")
+        return client.convert(indata=data, convert_to=convert_to)
+
+class ConverterPool:
+    """
+    Fixed pool of warm converters. Jobs wait in a queue for the next free converter, so at
+    most one document is converted per LibreOffice instance at a time.
+
+    :param size: Number of converters to start when no external addresses are given
+    """
+
+    def __init__(self, size=PDF_CONVERTER_POOL_SIZE):
+        if UNOSERVER_ADDRESSES:
+            self.converters = []
+            for index, address in enumerate(UNOSERVER_ADDRESSES):
+                host, _, port = address.rpartition(":")
+                self.converters.append(Converter(host or "127.0.0.1", int(port), index, managed=False))
+        else:
+            self.converters = [Converter("127.0.0.1", None, index, managed=True) for index in range(size)]
+        self._free = queue.Queue()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """
+        Start every converter once. Called on first use, or at startup to have the pool warm
+        before the first request.
+        """
+        with self._start_lock:
+            if self._started:
+                return
+            try:
+                for converter in self.converters:
+                    converter.start()
+            except Exception:
+                self.stop()
+                raise
+            for converter in self.converters:
+                self._free.put(converter)
+            self._started = True
+            atexit.register(self.stop)
+
+    def stop(self):
+        for converter in self.converters:
+            converter.stop()
+            if converter.profile_dir:
+                shutil.rmtree(converter.profile_dir, ignore_errors=True)
+
+    def convert(self, data: bytes, convert_to: str = "pdf") -> bytes:
+        """
+        Convert a document with the next free converter, restarting it once if it has died.
+
+        :param data: Document bytes, e.g. a .docx
+        :param convert_to: Target extension
+        :return: Converted document bytes, or None if the conversion failed
+        """
+        try:
+            self.start()
+        except Exception as e:
+            logger.error(f"Could not start PDF converters: {type(e).__name__}: {str(e)}")
+            return None
+
+        converter = self._free.get()
+        try:
+            started = time.perf_counter()
+            try:
+                result = converter.convert(data, convert_to)
+            except (ConnectionError, OSError) as e:
+                if not converter.managed:
+                    raise
+                logger.info(f"Converter on port {converter.port} is unavailable ({e}), restarting")
+                converter.restart()
+                result = converter.convert(data, convert_to)
+            logger.info(f"Converted {len(data)} bytes to {convert_to} in {time.perf_counter() - started:.2f}s")
+            return result
+        except Exception as e:
+            logger.error(f"Conversion to {convert_to} failed: {type(e).__name__}: {str(e)}")
+            return None
+        finally:
+            self._free.put(converter)
+
+converter_pool = ConverterPool()
+
+def convert_to_pdf(data: bytes) -> bytes:
+    """
+    Convert .docx bytes to PDF using the shared converter pool.
+
+    :param data: .docx bytes
+    :return: PDF bytes, or None if the conversion failed
+    """
+    return converter_pool.convert(data, "pdf")
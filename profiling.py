@@ -0,0 +1,183 @@
+import os
+import re
+import sys
+import hmac
+import time
+import uuid
+import cProfile
+import logging
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Admin-only profiling of live requests. An admin sends X-Admin-Token with X-Profile set to
+# "cprofile" or "sample" on a REST request, or passes profile and admin_token to an MCP tool, and
+# the profile is written to PROFILE_DIR for download from /admin/profiles. Profiling is disabled
+# when ADMIN_TOKEN isn't set.
+#   cprofile  deterministic profile of every thread, as a .pstats file. On Python 3.12+ cProfile
+#             sees all threads, so the extraction and upload threads are included.
+#   sample    wall-clock stack samples of every busy thread, as folded stacks (.folded) for
+#             flamegraph.pl, speedscope or inferno. Shows where time is spent waiting on the network.
+# The render worker process writes its own .pstats and a tracemalloc snapshot of create_word_doc.
+# Both modes record the whole worker process, not one request. Requests running on the same worker
+# at the same time are in the profile too, so profile on an idle worker for a per-request profile.
+# The render worker only renders one document at a time, so its profile is always the request's own.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "proposal_agent_profiles"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", 5)) / 1000
+PROFILE_MODES = ("cprofile", "sample")
+
+PROFILE_FILE_PATTERN = re.compile(r"[0-9]{8}_[0-9]{6}-[0-9a-f]{8}[\w.-]*")
+
+# ID of the profile the current request is recorded under
+current_profile = ContextVar("current_profile", default=None)
+
+# Only one profiler can be attached to the interpreter at a time
+_profile_lock = threading.Lock()
+
+# Threads parked with nothing to do, left out of the samples. Matched against the innermost frame
+# and its caller, since most of them wait inside threading.
+IDLE_FRAMES = {("thread.py", "_worker"), ("selectors.py", "select"), ("queues.py", "_feed")}
+
+def is_admin(token):
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stacks of every other thread at a fixed interval.
+
+    :param interval: Seconds between samples
+    """
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if any(
+                    (os.path.basename(inner.f_code.co_filename), inner.f_code.co_name) in IDLE_FRAMES
+                    for inner in (frame, frame.f_back) if inner is not None
+                ):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+@contextmanager
+def profile_request(mode, label=""):
+    """
+    Profile everything the process runs inside the block. Yields the profile ID, or None if
+    another profile is already being recorded.
+
+    :param mode: "cprofile" or "sample"
+    :param label: Request description, logged with the profile ID
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode}. Valid modes are {', '.join(PROFILE_MODES)}")
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning(f"Not profiling {label}, another profile is being recorded")
+        yield None
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile_id = f"{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    token = current_profile.set(profile_id)
+    profiler = cProfile.Profile() if mode == "cprofile" else StackSampler()
+    started = time.perf_counter()
+    try:
+        if mode == "cprofile":
+            profiler.enable()
+        else:
+            profiler.start()
+        yield profile_id
+    finally:
+        if mode == "cprofile":
+            profiler.disable()
+            profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.pstats"))
+        else:
+            profiler.stop()
+            profiler.write(os.path.join(PROFILE_DIR, f"{profile_id}.folded"))
+        current_profile.reset(token)
+        _profile_lock.release()
+        logger.info(f"Profile {profile_id} of {label} recorded in {time.perf_counter() - started:.2f}s")
+
+def render_profile_path():
+    # Path prefix for the render worker's profile of the current request, None when not profiling
+    profile_id = current_profile.get()
+    return os.path.join(PROFILE_DIR, f"{profile_id}-render") if profile_id else None
+
+def list_profiles():
+    """
+    List the recorded profile files, newest first.
+
+    :return: List of dicts with name, size and modified time
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.is_file() and PROFILE_FILE_PATTERN.fullmatch(entry.name):
+            stat = entry.stat()
+            profiles.append({"name": entry.name, "size": stat.st_size, "modified": stat.st_mtime})
+    return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+def get_profile_path(name):
+    """
+    Resolve a profile file name to its path, rejecting anything outside PROFILE_DIR.
+
+    :param name: File name as returned by list_profiles
+    :return: Path of the file, or None if there is no such profile
+    """
+    if not PROFILE_FILE_PATTERN.fullmatch(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+class ProfileMiddleware:
+    """
+    ASGI middleware profiling requests from an admin that carry an X-Profile header.
+    Everything else passes straight through. The response carries the profile ID in X-Profile-Id.
+
+    :param app: ASGI app to wrap
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        mode = headers.get(b"x-profile", b"").decode()
+        if mode not in PROFILE_MODES or not is_admin(headers.get(b"x-admin-token", b"").decode()):
+            return await self.app(scope, receive, send)
+
+        with profile_request(mode, f"{scope['method']} {scope['path']}") as profile_id:
+            async def send_with_profile_id(message):
+                if message["type"] == "http.response.start" and profile_id:
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile_id)
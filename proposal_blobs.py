@@ -0,0 +1,118 @@
+import re
+import unicodedata
+from datetime import datetime, timezone
+from blob import list_blobs_page, find_blobs_by_tags, get_blobs_properties, get_blob_sas_url
+
+# Proposal documents are stored as
+#   <yyyy>/<mm>/<dd>/<client>/<proposal id>/<hhmmssffffff>.<docx|pdf>
+# The date and client prefixes let a day, a month or one client's proposals on a day be listed by
+# prefix. The proposal ID keeps names unique, and every render gets its own blob, so links handed out
+# for an earlier version keep their document. Each blob is also given index tags (proposal ID,
+# client, date, type) for searches the prefixes can't scope, such as one client across all dates.
+
+UNKNOWN_CLIENT = "unknown-client"
+DATE_PATTERN = re.compile(r"(\d{4})(?:[-/](\d{2}))?(?:[-/](\d{2}))?")
+PROPOSAL_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+def to_ascii(value):
+    # Accented letters lose their accents rather than being dropped
+    return unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode("ascii")
+
+def client_slug(name):
+    # Lowercase letters, digits and dashes, safe in blob names and tag values
+    slug = re.sub(r"[^a-z0-9]+", "-", to_ascii(name).lower()).strip("-")[:40].strip("-")
+    return slug or UNKNOWN_CLIENT
+
+def proposal_client(project_data):
+    basic_info = project_data.get("BASIC_INFO", {})
+    for key in ("COMPANY NAME", "CLIENT"):
+        value = (basic_info.get(key) or "").strip()
+        if value and value.lower() != "not specified":
+            return value
+    return None
+
+def header_safe(value):
+    # Metadata is sent as HTTP headers, which only carry ASCII
+    return " ".join(to_ascii(value).split())
+
+def proposal_blob(proposal_id, project_data, extension):
+    """
+    Name, metadata and index tags for a proposal document rendered now.
+
+    :param proposal_id: ID of the proposal
+    :param project_data: Extracted sections, for the client and title
+    :param extension: "docx" or "pdf"
+    :return: Tuple of the blob name, metadata and tags
+    """
+    now = datetime.now(timezone.utc)
+    client = proposal_client(project_data)
+    slug = client_slug(client)
+    name = f"{now:%Y/%m/%d}/{slug}/{proposal_id}/{now:%H%M%S%f}.{extension}"
+    metadata = {
+        "proposal_id": proposal_id,
+        "client": header_safe(client),
+        "title": header_safe(project_data.get("BASIC_INFO", {}).get("PROJECT TITLE"))
+    }
+    tags = {"proposal_id": proposal_id, "client": slug, "date": f"{now:%Y-%m-%d}", "type": extension}
+    return name, metadata, tags
+
+def parse_date(date):
+    # "2025", "2025-06" or "2025-06-30", slashes work too. Returns the parts that were given.
+    match = DATE_PATTERN.fullmatch(date.strip())
+    if not match:
+        raise ValueError(f"Invalid date: {date}. Use YYYY, YYYY-MM or YYYY-MM-DD")
+    return [part for part in match.groups() if part]
+
+def proposal_document(blob):
+    # The same fields whichever way the blob was found, the date is read from the start of its name
+    metadata = blob["metadata"]
+    date = "-".join(blob["name"].split("/")[:3])
+    return {
+        "name": blob["name"],
+        "proposal_id": metadata.get("proposal_id"),
+        "client": metadata.get("client"),
+        "title": metadata.get("title"),
+        "date": date if DATE_PATTERN.fullmatch(date) else None,
+        "last_modified": blob["last_modified"],
+        "url": get_blob_sas_url(blob["name"])
+    }
+
+def search_proposal_documents(client=None, date=None, proposal_id=None, page_size=20, continuation_token=None):
+    """
+    One page of proposal documents. A date, or a full date and a client, is listed by prefix. A
+    proposal ID, or a client over a month, a year or all dates, is looked up through the index tags.
+
+    :param client: Client or company name
+    :param date: Year, month or day, as YYYY, YYYY-MM or YYYY-MM-DD
+    :param proposal_id: ID of one proposal, for all of its documents
+    :param page_size: Most documents to return
+    :param continuation_token: Token from the previous page
+    :return: Dict with the documents and the token for the next page, None on the last page
+    """
+    if not (client or date or proposal_id):
+        raise ValueError("Give a client, a date or a proposal ID to search by")
+    if proposal_id and not PROPOSAL_ID_PATTERN.fullmatch(proposal_id):
+        raise ValueError(f"Invalid proposal ID: {proposal_id}")
+    date_parts = parse_date(date) if date else []
+
+    if date_parts and not proposal_id and (not client or len(date_parts) == 3):
+        prefix = "/".join(date_parts) + "/"
+        if client:
+            prefix += f"{client_slug(client)}/"
+        blobs, token = list_blobs_page(prefix, page_size, continuation_token)
+    else:
+        # Tag values are limited to the characters of a slug, a hex ID and a date, so nothing needs quoting
+        conditions = []
+        if proposal_id:
+            conditions.append(f"\"proposal_id\" = '{proposal_id}'")
+        if client:
+            conditions.append(f"\"client\" = '{client_slug(client)}'")
+        if date_parts:
+            missing = 3 - len(date_parts)
+            conditions.append(f"\"date\" >= '{'-'.join(date_parts + ['00'] * missing)}'")
+            conditions.append(f"\"date\" <= '{'-'.join(date_parts + ['99'] * missing)}'")
+        found, token = find_blobs_by_tags(" AND ".join(conditions), page_size, continuation_token)
+        # Tag queries only return the tags, the title and display name of the client are in the metadata
+        blobs = get_blobs_properties([blob["name"] for blob in found])
+
+    return {"documents": [proposal_document(blob) for blob in blobs], "continuation_token": token}
@@ -0,0 +1,169 @@
+import asyncio
+import contextlib
+import logging
+import os
+import re
+import tempfile
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+import httpx
+import uvicorn
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+# SseServerTransport keeps each session's stream in the memory of the worker that accepted the
+# /sse/ connection. The router records which worker owns every session, and any worker that gets
+# a POST for a session it doesn't own forwards it to the owner over that worker's Unix socket.
+SESSION_REGISTRY_DIR = os.getenv("SESSION_REGISTRY_DIR", os.path.join(tempfile.gettempdir(), "proposal_agent_sessions"))
+
+SESSION_ID_PATTERN = re.compile(rb"session_id=([0-9a-f]{32})")
+VALID_SESSION_ID = re.compile(r"[0-9a-f]{32}")
+
+class FileSessionRegistry:
+    """
+    Session ID to owning worker socket, one file per session in a directory shared by the
+    workers on a host. Stands in for a shared broker such as Redis when scaling across hosts.
+
+    :param directory: Directory for the session files and worker sockets
+    """
+
+    def __init__(self, directory=SESSION_REGISTRY_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id):
+        return os.path.join(self.directory, f"{session_id}.session")
+
+    def register(self, session_id, owner):
+        # Written to a temporary file and renamed, so readers never see a partial owner
+        path = self._path(session_id)
+        with open(f"{path}.tmp", "w") as file:
+            file.write(owner)
+        os.replace(f"{path}.tmp", path)
+
+    def lookup(self, session_id):
+        try:
+            with open(self._path(session_id), "r") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def unregister(self, session_id):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path(session_id))
+
+    def unregister_owner(self, owner):
+        for name in os.listdir(self.directory):
+            if name.endswith(".session") and self.lookup(name[:-len(".session")]) == owner:
+                self.unregister(name[:-len(".session")])
+
+class SocketServer(uvicorn.Server):
+    # Runs inside a worker next to its main server, which keeps handling the signals
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+class SessionRouter:
+    """
+    Routes MCP SSE messages to the worker that owns the session.
+
+    Use connect_sse and handle_post_message in place of the transport's own, and call start and
+    stop from the application's startup and shutdown hooks.
+
+    :param transport: SseServerTransport of this worker
+    :param registry: Shared session registry
+    """
+
+    def __init__(self, transport, registry=None):
+        self.transport = transport
+        self.registry = registry or FileSessionRegistry()
+        self.socket_path = None
+        self._server = None
+        self._server_task = None
+        self._clients = {}
+
+    async def start(self):
+        # Forwarded messages arrive on this worker's socket and go straight to the transport.
+        # Named at startup rather than import, which may happen in a preloading parent process.
+        self.socket_path = os.path.join(self.registry.directory, f"worker-{os.getpid()}.sock")
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.socket_path)
+        config = uvicorn.Config(
+            self.transport.handle_post_message, uds=self.socket_path, interface="asgi3", log_level="warning", lifespan="off"
+        )
+        self._server = SocketServer(config)
+        self._server_task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._server_task.done():
+                self._server_task.result()
+            await asyncio.sleep(0.01)
+        logger.info(f"Session router listening on {self.socket_path}")
+
+    async def stop(self):
+        self.registry.unregister_owner(self.socket_path)
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._server_task
+            self._server = None
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.socket_path)
+
+    @asynccontextmanager
+    async def connect_sse(self, scope, receive, send):
+        # The transport picks the session ID and only tells the client, in the first "endpoint"
+        # event of the stream. It is registered from there before the event is sent on.
+        session = {}
+
+        async def intercept(message):
+            if "id" not in session and message["type"] == "http.response.body":
+                match = SESSION_ID_PATTERN.search(message.get("body", b""))
+                if match:
+                    session["id"] = match.group(1).decode()
+                    self.registry.register(session["id"], self.socket_path)
+            await send(message)
+
+        try:
+            async with self.transport.connect_sse(scope, receive, intercept) as streams:
+                yield streams
+        finally:
+            if "id" in session:
+                self.registry.unregister(session["id"])
+
+    async def handle_post_message(self, scope, receive, send):
+        session_id = parse_qs(scope["query_string"].decode()).get("session_id", [""])[0]
+        owner = self.registry.lookup(session_id) if VALID_SESSION_ID.fullmatch(session_id) else None
+        if owner is None or owner == self.socket_path:
+            # Ours, or unknown everywhere, in which case the transport gives its usual error
+            return await self.transport.handle_post_message(scope, receive, send)
+        await self.forward(owner, session_id, scope, receive, send)
+
+    async def forward(self, owner, session_id, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        client = self._clients.get(owner)
+        if client is None:
+            client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=owner), base_url="http://worker")
+            self._clients[owner] = client
+        headers = {key.decode(): value.decode() for key, value in scope["headers"] if key in (b"content-type", b"host")}
+        try:
+            forwarded = await client.post("/", params={"session_id": session_id}, content=body, headers=headers)
+            response = Response(forwarded.content, status_code=forwarded.status_code, media_type=forwarded.headers.get("content-type"))
+        except httpx.TransportError as e:
+            # The owning worker has gone, so has the session
+            logger.warning(f"Could not reach {owner} for session {session_id}: {e}")
+            self.registry.unregister(session_id)
+            # Concurrent forwards to the same dead worker all fail, only the first closes the client
+            stale = self._clients.pop(owner, None)
+            if stale is not None:
+                await stale.aclose()
+            response = Response("Could not find session", status_code=404)
+        await response(scope, receive, send)
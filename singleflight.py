@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single run of a blocking function.
+    
+    Callers that arrive while a run is in flight wait on the same result, and successful
+    results are kept for a short TTL so immediate retries return straight away.
+    
+    :param ttl_seconds: How long a completed result is reused for
+    :param cacheable: Optional predicate deciding whether a result may be reused
+    """
+
+    def __init__(self, ttl_seconds=300, cacheable=None):
+        self.ttl_seconds = ttl_seconds
+        self.cacheable = cacheable
+        self._in_flight = {}
+        self._results = {}
+
+    async def run(self, key, func, *args):
+        """
+        Run func(*args) in a worker thread, or attach to the run already in progress for key.
+        
+        :param key: Hashable key identifying identical requests
+        :param func: Blocking function to run
+        :return: The function result, shared between all callers with the same key
+        """
+        self._remove_expired()
+        if key in self._results:
+            logger.info(f"Reusing completed result for {key}")
+            return self._results[key][1]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(func, *args))
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self._in_flight[key] = task
+        else:
+            logger.info(f"Attaching to in-flight request for {key}")
+
+        # Shield the shared task so one caller disconnecting doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if self.cacheable is None or self.cacheable(result):
+            self._results[key] = (time.monotonic() + self.ttl_seconds, result)
+
+    def _remove_expired(self):
+        now = time.monotonic()
+        for key in [key for key, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[key]
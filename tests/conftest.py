@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Modules read their settings at import, so these are set before any test imports the package.
+# The replay backend answers LLM calls offline, storage goes to a scratch directory.
+SCRATCH_DIR = tempfile.mkdtemp(prefix="proposal_agent_tests_")
+os.environ.setdefault("LLM_BACKEND", "replay")
+os.environ.setdefault("PROPOSAL_DB_PATH", os.path.join(SCRATCH_DIR, "proposals.db"))
+os.environ.setdefault("SESSION_REGISTRY_DIR", os.path.join(SCRATCH_DIR, "sessions"))
+os.environ.setdefault("RENDER_WORKERS", "1")
@@ -0,0 +1,35 @@
+import httpx
+import pytest
+from openai import APITimeoutError
+from AIA_ProposalAgent import ai_service
+
+class TimingOutBackend:
+    # Times out on the primary deployment and answers on any other, recording each call
+    def __init__(self, primary):
+        self.primary = primary
+        self.calls = []
+
+    def create(self, model, messages, **kwargs):
+        self.calls.append((model, kwargs))
+        if model == self.primary:
+            raise APITimeoutError(request=httpx.Request("POST", "https://example.test"))
+        return f"answer from {model}"
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = TimingOutBackend("primary")
+    monkeypatch.setattr(ai_service, "backend", backend)
+    return backend
+
+def test_timeout_falls_back_to_the_fallback_deployment(backend, monkeypatch):
+    monkeypatch.setitem(ai_service.MODEL_ROUTES, "SCOPE", {"model": "primary", "fallback": "backup"})
+    assert ai_service.create_completion([], "SCOPE") == "answer from backup"
+    assert [model for model, _ in backend.calls] == ["primary", "backup"]
+    # The client doesn't retry the slow deployment itself when there is a fallback to go to
+    assert backend.calls[0][1]["max_retries"] == 0
+
+def test_timeout_without_a_fallback_is_raised(backend, monkeypatch):
+    monkeypatch.setitem(ai_service.MODEL_ROUTES, "SCOPE", {"model": "primary", "fallback": "primary"})
+    with pytest.raises(APITimeoutError):
+        ai_service.create_completion([], "SCOPE")
+    assert [model for model, _ in backend.calls] == ["primary"]
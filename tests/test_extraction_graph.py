@@ -0,0 +1,20 @@
+from AIA_ProposalAgent import extraction_graph
+from AIA_ProposalAgent.extraction_graph import stream_section
+
+def test_failed_stream_falls_back_to_a_complete_extraction(monkeypatch):
+    def broken_stream(document_text, context=None):
+        yield "Phase one covers discovery"
+        raise ConnectionError("stream reset")
+
+    monkeypatch.setitem(extraction_graph.STREAMED_SECTIONS, "PLAN", broken_stream)
+    monkeypatch.setitem(extraction_graph.SECTION_EXTRACTORS, "PLAN", lambda document_text, context=None: "Complete plan")
+    fragments = {}
+    assert stream_section("PLAN", "input", {}, fragments) == "Complete plan"
+    # The partly rendered fragment is dropped, the document renders the complete text instead
+    assert "PLAN" not in fragments
+
+def test_complete_stream_is_rendered(monkeypatch):
+    monkeypatch.setitem(extraction_graph.STREAMED_SECTIONS, "PLAN", lambda document_text, context=None: iter(["Phase one. ", "Phase two."]))
+    fragments = {}
+    assert stream_section("PLAN", "input", {}, fragments) == "Phase one. Phase two."
+    assert "PLAN" in fragments
@@ -0,0 +1,66 @@
+import time
+from collections import deque
+import pytest
+from AIA_ProposalAgent import hedging
+
+SLOW_SECONDS = 0.2
+
+@pytest.fixture
+def hedge(monkeypatch):
+    # Hedging on with fresh counters, and a section whose recent calls all took 10ms
+    monkeypatch.setattr(hedging, "LLM_HEDGE", True)
+    monkeypatch.setattr(hedging, "LLM_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(hedging, "LLM_HEDGE_BUDGET", 0.1)
+    monkeypatch.setattr(hedging, "HEDGE_MODEL", "hedge")
+    monkeypatch.setattr(hedging, "_latencies", {"SCOPE": deque([0.01] * 3, maxlen=hedging.LATENCY_WINDOW)})
+    monkeypatch.setattr(hedging, "_recent_calls", deque(maxlen=hedging.BUDGET_WINDOW))
+    monkeypatch.setattr(hedging, "_counters", dict.fromkeys(hedging._counters, 0))
+
+def backend(answers, calls):
+    # The first deployment is slow, the hedge deployment answers straight away
+    def create(model, messages, **kwargs):
+        calls.append(model)
+        if model != "hedge":
+            time.sleep(SLOW_SECONDS)
+        return answers[model]
+    return create
+
+def test_slow_call_is_answered_by_the_hedge(hedge):
+    calls = []
+    hedging._recent_calls.extend({"hedged": False} for _ in range(9))
+    create = backend({"primary": "slow", "hedge": "fast"}, calls)
+    assert hedging.hedged_create(create, "primary", [], "SCOPE") == "fast"
+    assert calls == ["primary", "hedge"]
+    assert hedging._counters["hedge_won"] == 1
+
+def test_no_hedge_once_the_budget_is_used_up(hedge):
+    calls = []
+    # A budget of 10% lets the tenth call be hedged but not the eleventh
+    hedging._recent_calls.extend({"hedged": False} for _ in range(9))
+    create = backend({"primary": "slow", "hedge": "fast"}, calls)
+    assert hedging.hedged_create(create, "primary", [], "SCOPE") == "fast"
+
+    calls.clear()
+    assert hedging.hedged_create(create, "primary", [], "SCOPE") == "slow"
+    assert calls == ["primary"]
+    assert hedging._counters["hedged"] == 1
+    assert hedging._counters["over_budget"] == 1
+
+def test_invalid_hedge_response_is_not_used(hedge):
+    calls = []
+    hedging._recent_calls.extend({"hedged": False} for _ in range(9))
+    create = backend({"primary": "valid", "hedge": "invalid"}, calls)
+
+    def validate(completion):
+        if completion == "invalid":
+            raise ValueError("Response doesn't match the schema")
+
+    assert hedging.hedged_create(create, "primary", [], "SCOPE", validate) == "valid"
+    assert calls == ["primary", "hedge"]
+    assert hedging._counters["hedge_won"] == 0
+
+def test_section_without_enough_samples_is_not_hedged(hedge):
+    calls = []
+    create = backend({"primary": "slow", "hedge": "fast"}, calls)
+    assert hedging.hedged_create(create, "primary", [], "PLAN") == "slow"
+    assert calls == ["primary"]
@@ -0,0 +1,62 @@
+import pytest
+from AIA_ProposalAgent.local_extract import (
+    find_total_cost, find_dates, find_company_name, find_team_members, extract_local_basic_info
+)
+
+@pytest.mark.parametrize("text, total", [
+    ("The total budget is $40,000.", "$40,000"),
+    ("The total is $1,200.50 including hosting.", "$1,200.50"),
+    ("The budget is $12.5k.", "$12,500"),
+    ("The budget is around $1.2m overall.", "$1,200,000"),
+    ("Total quoted: AUD 8k", "$8,000"),
+    ("The total budget is $45k.", "$45,000"),
+])
+def test_total_cost(text, total):
+    assert find_total_cost(text) == total
+
+def test_total_cost_needs_a_total_word():
+    assert find_total_cost("Hosting costs $200 a month.") is None
+
+def test_conflicting_totals_are_left_to_the_llm():
+    assert find_total_cost("The total is $10k. The overall budget is $12k.") is None
+
+@pytest.mark.parametrize("text, dates", [
+    ("The project starts on 3 March 2026 and is due by 2026-06-30.", {"START DATE": "03/03/2026", "END DATE": "30/06/2026"}),
+    ("Kick-off is 05/04/2026.", {"START DATE": "05/04/2026"}),
+    ("Work begins March 9, 2026.", {"START DATE": "09/03/2026"}),
+    ("We met on 1 February 2026 to discuss the portal.", {}),
+])
+def test_dates(text, dates):
+    assert find_dates(text) == dates
+
+def test_two_start_dates_are_left_to_the_llm():
+    assert find_dates("Start on 1 March 2026. Alternatively start on 8 March 2026.") == {}
+
+@pytest.mark.parametrize("text, company", [
+    ("We are building a portal for Acme Pty Ltd.", "Acme Pty Ltd"),
+    ("Acme Pty Ltd needs a booking portal.", "Acme Pty Ltd"),
+    ("The client is Blue Sky Digital Pty. Ltd. and they want an app.", "Blue Sky Digital Pty. Ltd"),
+    ("Yesterday Acme Pty Ltd asked for a quote. The portal is for Acme Pty Ltd.", "Acme Pty Ltd"),
+])
+def test_company_name(text, company):
+    assert find_company_name(text) == company
+
+@pytest.mark.parametrize("text", [
+    "Yesterday Acme Pty Ltd asked for a quote.",
+    "The portal is for Acme Pty Ltd and Globex Ltd.",
+    "Nothing here names a company.",
+])
+def test_ambiguous_company_name_is_left_to_the_llm(text):
+    assert find_company_name(text) is None
+
+def test_team_members_use_full_names_once():
+    text = "Sam Cunningham will lead, with Sean on development. Sam will also review. Lindsey handles design."
+    assert find_team_members(text) == ["Samuel Cunningham", "Sean Oldenburger", "Lindsey Hershman"]
+
+def test_unknown_people_are_not_team_members():
+    assert find_team_members("Jane Smith from the client will join the meetings.") == []
+
+def test_roles():
+    info = extract_local_basic_info("Sean is the project manager. The proposal was prepared by Sam.")
+    assert info["PROJECT MANAGER"] == "Sean Oldenburger"
+    assert info["AUTHOR"] == "Samuel Cunningham"
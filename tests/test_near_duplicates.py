@@ -0,0 +1,27 @@
+import pytest
+from AIA_ProposalAgent.near_duplicates import changed_sections, GENERAL_SECTIONS
+
+BASE = (
+    "Acme Pty Ltd needs a customer portal for booking services. "
+    "The portal will let customers book and pay online. "
+    "The budget is $40,000. "
+    "The team will include a developer and a designer."
+)
+
+@pytest.mark.parametrize("added", [
+    "The team will also build a mobile app.",
+    "The client also wants a reporting dashboard.",
+    "We will also deliver an analytics dashboard with access for managers.",
+    "Customers should be able to cancel bookings.",
+])
+def test_content_changes_rerun_general_sections(added):
+    sections = changed_sections(BASE, f"{BASE} {added}")
+    assert set(GENERAL_SECTIONS) <= sections
+
+def test_matched_sections_are_kept():
+    sections = changed_sections(BASE, BASE.replace("$40,000", "$55,000"))
+    assert "BUDGET" in sections
+    assert set(GENERAL_SECTIONS) <= sections
+
+def test_unchanged_input_reruns_nothing():
+    assert changed_sections(BASE, BASE) == set()
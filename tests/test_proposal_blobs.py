@@ -0,0 +1,33 @@
+import pytest
+import proposal_blobs
+
+NAME = "2025/06/30/acme-pty-ltd/0123456789abcdef0123456789abcdef/101500000000.docx"
+METADATA = {"proposal_id": "0123456789abcdef0123456789abcdef", "client": "Acme Pty Ltd", "title": "Booking Portal"}
+LISTED = {"name": NAME, "size": 100, "last_modified": "2025-06-30T10:15:00+00:00", "metadata": METADATA}
+
+@pytest.fixture
+def storage(monkeypatch):
+    # Listing, tag queries and properties answered from one blob instead of Azure
+    monkeypatch.setattr(proposal_blobs, "list_blobs_page", lambda prefix, page_size, token: ([LISTED], None))
+    tags = {"proposal_id": METADATA["proposal_id"], "client": "acme-pty-ltd", "date": "2025-06-30", "type": "docx"}
+    monkeypatch.setattr(proposal_blobs, "find_blobs_by_tags", lambda expression, page_size, token: ([{"name": NAME, "tags": tags}], None))
+    monkeypatch.setattr(proposal_blobs, "get_blobs_properties", lambda names: [LISTED for name in names])
+    monkeypatch.setattr(proposal_blobs, "get_blob_sas_url", lambda name: f"https://example.test/{name}?sig")
+
+def test_prefix_and_tag_searches_return_the_same_document(storage):
+    by_prefix = proposal_blobs.search_proposal_documents(date="2025-06-30")
+    by_tags = proposal_blobs.search_proposal_documents(proposal_id=METADATA["proposal_id"])
+    assert by_prefix == by_tags
+    assert by_prefix["documents"] == [{
+        "name": NAME,
+        "proposal_id": METADATA["proposal_id"],
+        "client": "Acme Pty Ltd",
+        "title": "Booking Portal",
+        "date": "2025-06-30",
+        "last_modified": "2025-06-30T10:15:00+00:00",
+        "url": f"https://example.test/{NAME}?sig"
+    }]
+
+def test_search_needs_a_filter():
+    with pytest.raises(ValueError):
+        proposal_blobs.search_proposal_documents()
@@ -0,0 +1,43 @@
+import pytest
+from AIA_ProposalAgent import main
+from AIA_ProposalAgent.near_duplicates import GENERAL_SECTIONS
+
+INPUT = "Acme Pty Ltd needs a booking portal. The total budget is $40,000."
+
+@pytest.fixture
+def extracted(monkeypatch):
+    # Records which sections would be sent to the LLM instead of running them
+    calls = {}
+    def extract_project_info(document_text, sections=None, project_data=None, fragments=None, timings=None):
+        calls["text"], calls["sections"] = document_text, list(sections)
+        return project_data
+    monkeypatch.setattr(main, "extract_project_info", extract_project_info)
+    return calls
+
+def test_notes_only_reruns_general_sections_and_dependents(extracted):
+    main.regenerate_project_info(INPUT, {}, notes="The portal also needs a staff roster.")
+    assert set(GENERAL_SECTIONS) <= set(extracted["sections"])
+    # BUDGET reads TIMELINE's total duration
+    assert "BUDGET" in extracted["sections"]
+    assert extracted["text"].endswith("Additional notes:\nThe portal also needs a staff roster.")
+
+def test_notes_only_reruns_sections_the_notes_mention(extracted):
+    main.regenerate_project_info(INPUT, {}, notes="Sean will join the delivery team.")
+    assert "DELIVERY_TEAM" in extracted["sections"]
+
+def test_given_sections_are_not_widened_by_notes(extracted):
+    main.regenerate_project_info(INPUT, {}, sections=["ASSUMPTIONS"], notes="Hosting is provided by the client.")
+    assert extracted["sections"] == ["ASSUMPTIONS"]
+
+def test_no_sections_values_or_notes_reruns_nothing(extracted):
+    main.regenerate_project_info(INPUT, {})
+    assert extracted["sections"] == []
+
+def test_notes_only_request_is_accepted_by_the_api():
+    from fastapi.testclient import TestClient
+    from app import app
+    client = TestClient(app)
+    # Accepted and looked up, so an unknown proposal is a 404 rather than a 400 for missing sections
+    response = client.post(f"/proposals/{'0' * 32}/regenerate", json={"notes": "Add a staff roster."})
+    assert response.status_code == 404
+    assert client.post(f"/proposals/{'0' * 32}/regenerate", json={"notes": "  "}).status_code == 400
@@ -0,0 +1,23 @@
+import pytest
+from pydantic import ValidationError
+from AIA_ProposalAgent.schemas import validate_section_values
+
+TIMELINE = {"MILESTONES": [{"DESCRIPTION": "Build", "ESTIMATED_TIME": 10}], "TOTAL_DURATION": 10}
+
+def test_valid_values_are_returned_as_stored():
+    values = validate_section_values({"TIMELINE": TIMELINE, "SCOPE": "Booking portal"})
+    assert values == {"TIMELINE": TIMELINE, "SCOPE": "Booking portal"}
+
+def test_extra_field_in_a_section_is_rejected():
+    with pytest.raises(ValidationError) as error:
+        validate_section_values({"TIMELINE": {**TIMELINE, "NOTES": "Rushed"}})
+    assert error.value.errors()[0]["loc"] == ("TIMELINE", "NOTES")
+
+def test_extra_field_in_a_nested_item_is_rejected():
+    milestones = [{"DESCRIPTION": "Build", "ESTIMATED_TIME": 10, "OWNER": "Sean"}]
+    with pytest.raises(ValidationError):
+        validate_section_values({"TIMELINE": {**TIMELINE, "MILESTONES": milestones}})
+
+def test_missing_field_is_rejected():
+    with pytest.raises(ValidationError):
+        validate_section_values({"TIMELINE": {"MILESTONES": []}})
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import pytest
+from singleflight import SingleFlight
+
+def test_concurrent_identical_calls_run_once():
+    calls = []
+    release = threading.Event()
+
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    async def main():
+        flight = SingleFlight()
+        callers = [asyncio.create_task(flight.run("key", work, 21)) for _ in range(5)]
+        # Let every caller attach before the work finishes
+        await asyncio.sleep(0.1)
+        release.set()
+        return await asyncio.gather(*callers)
+
+    assert asyncio.run(main()) == [42] * 5
+    assert calls == [21]
+
+def test_completed_result_is_reused_within_the_ttl():
+    calls = []
+
+    def work():
+        calls.append(1)
+        return "done"
+
+    async def main():
+        flight = SingleFlight(ttl_seconds=60)
+        return [await flight.run("key", work) for _ in range(2)]
+
+    assert asyncio.run(main()) == ["done", "done"]
+    assert len(calls) == 1
+
+def test_failure_is_not_cached():
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("upload failed")
+        return "done"
+
+    async def main():
+        flight = SingleFlight(ttl_seconds=60)
+        with pytest.raises(RuntimeError):
+            await flight.run("key", work)
+        return await flight.run("key", work)
+
+    assert asyncio.run(main()) == "done"
+    assert len(calls) == 2
+
+def test_result_rejected_by_cacheable_is_run_again():
+    calls = []
+
+    def work():
+        calls.append(1)
+        return ""
+
+    async def main():
+        flight = SingleFlight(ttl_seconds=60, cacheable=bool)
+        await flight.run("key", work)
+        await flight.run("key", work)
+
+    asyncio.run(main())
+    assert len(calls) == 2